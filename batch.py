@@ -0,0 +1,169 @@
+import numpy as np
+
+from genome import SHIFT_HOURS, SLOT_MINUTES, START_DATE, WORK_DAYS
+from tables import DEMAND_RANGES, SIMULATION_END, SIMULATION_START, TRAVEL_RANGES, horizon_tables
+
+NO_EVENT = np.iinfo(np.int64).max
+
+# Границы случайных величин по интервалу суток (см. tables)
+DEMAND_LOW, DEMAND_HIGH = np.array(DEMAND_RANGES).T
+TRAVEL_LOW, TRAVEL_HIGH = np.array(TRAVEL_RANGES).T
+
+
+def _driver_windows(genomes, tables):
+    """
+    Рабочие окна водителей по дням симуляции в минутах от начала симуляции.
+
+    Возвращает массивы lo, hi формы (особи, водители, дни) и маску valid
+    с теми же правилами, что Driver.can_drive: рабочие дни недели по типу
+    водителя и 3-дневный цикл для второго типа.
+    """
+    first_weekday = tables.start_time.weekday()
+    day_shift = (tables.start_time.date() - START_DATE).days  # День симуляции 0 в нумерации генома минус 1
+    days = np.arange(tables.num_days)
+    genes = np.array([list(genome) for genome in genomes], dtype=np.int64)  # (особи, водители, 3)
+    driver_type, slot, start_day = genes[..., 0], genes[..., 1], genes[..., 2]
+
+    shift_start = slot * SLOT_MINUTES
+    shift_end = shift_start + np.vectorize(SHIFT_HOURS.get)(driver_type) * 60
+    day_start = tables.day_start(days)
+    lo = day_start + shift_start[..., None]
+    hi = day_start + shift_end[..., None]
+
+    work_days = np.vectorize(WORK_DAYS.get)(driver_type)
+    weekday = (first_weekday + days) % 7
+    valid = weekday < work_days[..., None]
+    days_since_start = days + day_shift - (start_day[..., None] - 1)
+    in_cycle = (days_since_start >= 0) & (days_since_start % 3 == 0)
+    valid &= (driver_type[..., None] != 2) | (start_day[..., None] == 0) | in_cycle
+    return lo, hi, valid, driver_type
+
+
+def simulate_population(genomes, rng=None, start_time=SIMULATION_START,
+                        end_time=SIMULATION_END, num_stops=8, capacity=26,
+                        departure_interval=0, daily_break_reset=False, network=None):
+    """
+    Пакетная симуляция: считает число перевезённых пассажиров сразу для всех геномов.
+
+    Состояние всех особей хранится в массивах (особи x автобусы, особи x остановки).
+    За одну итерацию каждая особь обрабатывает своё ближайшее событие (прибытие
+    автобуса с наименьшим временем, при равенстве - с меньшим номером), как в
+    engine.EventSimulation, а случайные величины для всех особей выбираются
+    одним вызовом. Правила те же, что у Bus, BusStop и Driver: высадка с
+    вероятностью 60%, все выходят на конечной, обед водителя первого типа
+    на конечной с 13:00 до 15:00, 15-минутный перерыв второго типа, цикл
+    через 3 дня для второго типа.
+
+    Если задана сеть (network.Network), num_stops и capacity берутся из неё,
+    а каждый автобус ходит по кольцу своего маршрута.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    population_size = len(genomes)
+    num_buses = len(genomes[0])
+    tables = horizon_tables(start_time, end_time)
+    horizon = tables.horizon
+    band_table = np.frombuffer(tables.band, dtype=np.uint8)
+    lunch_table = np.frombuffer(tables.lunch, dtype=np.uint8).astype(bool)
+    lo, hi, valid, driver_type = _driver_windows(genomes, tables)
+    if network is not None:
+        num_stops = network.num_stops
+        capacity = np.array(network.capacities(), dtype=np.int64)
+        bus_routes = network.bus_routes()
+    else:
+        capacity = np.full(num_buses, capacity, dtype=np.int64)
+        bus_routes = [range(num_stops)] * num_buses
+    # Остановки маршрута каждого автобуса (дополнены до общей длины) и длина маршрута
+    route_length = np.array([len(route) for route in bus_routes], dtype=np.int64)
+    route_stops = np.zeros((num_buses, route_length.max()), dtype=np.int64)
+    for bus, route in enumerate(bus_routes):
+        route_stops[bus, :len(route)] = route
+
+    def next_drive_minute(p, b, minute):
+        # Первая минута не раньше minute, когда водитель может вести автобус
+        minute = minute[:, None]
+        candidates = np.where(valid[p, b] & (hi[p, b] >= minute), np.maximum(lo[p, b], minute), NO_EVENT)
+        result = candidates.min(axis=1)
+        return np.where(result < horizon, result, NO_EVENT)
+
+    rows = np.arange(population_size)
+    all_p = np.repeat(rows, num_buses)
+    all_b = np.tile(np.arange(num_buses), population_size)
+
+    waiting = rng.integers(0, 67, size=(population_size, num_stops))  # Ожидающие на остановках
+    load = np.zeros((population_size, num_buses), dtype=np.int64)       # Загрузка автобусов
+    position = np.zeros((population_size, num_buses), dtype=np.int64)   # Индекс текущей остановки
+    bus_schedule = np.tile(np.arange(num_buses, dtype=np.int64) * departure_interval, (population_size, 1))
+    break_until = np.full((population_size, num_buses), -1, dtype=np.int64)  # Конец перерыва
+    lunch_day = np.full((population_size, num_buses), -1, dtype=np.int64)    # День последнего обеда
+    total = np.zeros(population_size, dtype=np.int64)
+    arrival = next_drive_minute(all_p, all_b, bus_schedule.ravel()).reshape(population_size, num_buses)
+
+    while True:
+        b = arrival.argmin(axis=1)
+        minute = arrival[rows, b]
+        active = minute != NO_EVENT
+        if not active.any():
+            break
+        p, b, minute = rows[active], b[active], minute[active]
+        n = len(p)
+
+        band = band_table[minute]
+        day = tables.day_of(minute)
+        stop = route_stops[b, position[p, b]]
+        is_final_stop = position[p, b] == route_length[b] - 1
+
+        # Обновляем пассажиров на остановке
+        waiting[p, stop] += rng.integers(DEMAND_LOW[band], DEMAND_HIGH[band] + 1)
+
+        # Высадка: на конечной выходят все, иначе с вероятностью 60% случайная часть
+        current_load = load[p, b]
+        random_drop = np.floor(rng.random(n) * (current_load + 1)).astype(np.int64)
+        random_drop = np.where(rng.random(n) < 0.6, random_drop, 0)
+        dropped_off = np.where(is_final_stop, current_load, random_drop)
+        current_load = current_load - dropped_off
+
+        # Посадка
+        picked_up = np.minimum(waiting[p, stop], capacity[b] - current_load)
+        load[p, b] = current_load + picked_up
+        waiting[p, stop] -= picked_up
+        total[p] += dropped_off
+
+        # Перерывы на конечной остановке
+        types = driver_type[p, b]
+        taken = lunch_day[p, b] == day if daily_break_reset else lunch_day[p, b] >= 0
+        lunch = is_final_stop & (types == 1) & ~taken & lunch_table[minute]
+        short_break = is_final_stop & (types == 2)
+        lunch_day[p, b] = np.where(lunch, day, lunch_day[p, b])
+        delay = np.where(lunch, 60, np.where(short_break, 15, 0))
+        break_until[p, b] = np.where(delay > 0, minute + delay, break_until[p, b])
+
+        # Переход к следующей остановке
+        position[p, b] = (position[p, b] + 1) % route_length[b]
+        bus_schedule[p, b] += delay + rng.integers(TRAVEL_LOW[band], TRAVEL_HIGH[band] + 1)
+        earliest = np.maximum(np.maximum(bus_schedule[p, b], minute + 1), break_until[p, b] + 1)
+        arrival[p, b] = next_drive_minute(p, b, earliest)
+
+    return total
+
+
+class BatchEvaluator:
+    """Оценка популяции одним пакетным прогоном (интерфейс как у ParallelEvaluator)."""
+
+    def __init__(self, seed=None, end_time=SIMULATION_END, network=None):
+        self.rng = np.random.default_rng(seed)
+        self.end_time = end_time
+        self.network = network
+
+    def map(self, genomes):
+        if not genomes:
+            return []
+        return simulate_population(genomes, self.rng, end_time=self.end_time, network=self.network).tolist()
+
+    def state(self):
+        return self.rng.bit_generator.state
+
+    def load_state(self, state):
+        self.rng.bit_generator.state = state
+
+    def close(self):
+        pass
@@ -0,0 +1,146 @@
+"""
+Набор замеров производительности симулятора и генетического алгоритма.
+
+Все прогоны используют фиксированные seed, результаты пишутся в JSON,
+чтобы их можно было сравнить между версиями:
+
+    python benchmark.py --output new.json --compare old.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+
+from tables import SIMULATION_START, horizon_end
+
+
+def peak_rss_mb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / 1024 / 1024 if sys.platform == "darwin" else usage / 1024
+
+
+def bench_simulate_buses(days, repeats, seed):
+    from hands import simulate_buses
+
+    end_time = horizon_end(days)
+    simulated_minutes = (end_time - SIMULATION_START) // timedelta(minutes=1)
+    timings = []
+    for repeat in range(repeats):
+        random.seed(seed + repeat)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulate_buses(print_schedule=False, log="off", simulation_end_time=end_time)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {"benchmark": "simulate_buses", "horizon_days": days, "repeats": repeats,
+            "best_seconds": best, "simulated_minutes_per_second": simulated_minutes / best}
+
+
+def bench_fitness(days, evaluations, seed):
+    from genetik import GeneticAlgorithm
+
+    random.seed(seed)
+    ga = GeneticAlgorithm(population_size=evaluations, generations=0, mutation_rate=0.1,
+                          simulation_end_time=horizon_end(days))
+    population = ga.initialize_population()
+    start = time.perf_counter()
+    for schedule in population:
+        ga.simulate(schedule)  # Без кэша: меряем именно симуляцию
+    elapsed = time.perf_counter() - start
+    return {"benchmark": "fitness", "horizon_days": days, "evaluations": evaluations,
+            "seconds": elapsed, "evaluations_per_second": evaluations / elapsed}
+
+
+def _run_evolve(population_size, generations, days, seed):
+    from genetik import GeneticAlgorithm
+
+    random.seed(seed)
+    ga = GeneticAlgorithm(population_size, generations, mutation_rate=0.1, seed=seed,
+                          simulation_end_time=horizon_end(days))
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ga.evolve()
+    elapsed = time.perf_counter() - start
+    return {"benchmark": "evolve", "population_size": population_size, "generations": generations,
+            "horizon_days": days, "seconds": elapsed, "seconds_per_generation": elapsed / generations,
+            "cache_hit_rate": ga.cache.hit_rate(), "peak_rss_mb": peak_rss_mb()}
+
+
+def bench_evolve(population_size, generations, days, seed):
+    # Каждый прогон в отдельном свежем процессе, чтобы пиковая память не накапливалась
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(_run_evolve, population_size, generations, days, seed).result()
+
+
+def run_benchmarks(args):
+    results = []
+    for days in args.horizons:
+        results.append(bench_simulate_buses(days, args.repeats, args.seed))
+        results.append(bench_fitness(days, args.evaluations, args.seed))
+        for population_size in args.population_sizes:
+            results.append(bench_evolve(population_size, args.generations, days, args.seed))
+        for result in results[-2 - len(args.population_sizes):]:
+            print(json.dumps(result, ensure_ascii=False), file=sys.stderr)
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "results": results,
+    }
+
+
+def _result_key(result):
+    return tuple((name, value) for name, value in sorted(result.items())
+                 if name in ("benchmark", "horizon_days", "population_size", "generations", "evaluations"))
+
+
+def compare(report, baseline):
+    """Печатает отношение новых замеров к базовым (больше 1 - быстрее)."""
+    old = {_result_key(result): result for result in baseline["results"]}
+    for result in report["results"]:
+        previous = old.get(_result_key(result))
+        if previous is None:
+            continue
+        for metric in ("simulated_minutes_per_second", "evaluations_per_second"):
+            if metric in result:
+                print(f"{dict(_result_key(result))}: {metric} x{result[metric] / previous[metric]:.2f}")
+        if "seconds_per_generation" in result:
+            ratio = previous["seconds_per_generation"] / result["seconds_per_generation"]
+            print(f"{dict(_result_key(result))}: seconds_per_generation x{ratio:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры производительности симуляции и ГА")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--horizons", type=int, nargs="+", default=[7, 28], help="Длительность симуляции, дни")
+    parser.add_argument("--population-sizes", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--generations", type=int, default=3)
+    parser.add_argument("--evaluations", type=int, default=20, help="Число оценок в замере fitness")
+    parser.add_argument("--repeats", type=int, default=3, help="Повторы simulate_buses")
+    parser.add_argument("--output", help="Файл для JSON с результатами (по умолчанию stdout)")
+    parser.add_argument("--compare", help="JSON предыдущего прогона для сравнения")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            compare(report, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import time
+from collections import namedtuple
+
+# Состояние ГА после очередного поколения: лучшая особь за всё время
+Progress = namedtuple("Progress", "generation best_fitness best evaluations elapsed")
+
+# Причины остановки
+GENERATIONS = "generations"
+TIME = "time"
+EVALUATIONS = "evaluations"
+STAGNATION = "stagnation"
+
+STOP_MESSAGES = {
+    TIME: "исчерпан бюджет времени",
+    EVALUATIONS: "исчерпан бюджет оценок приспособленности",
+    STAGNATION: "лучший результат перестал улучшаться",
+}
+
+
+class Budget:
+    """
+    Ограничения для anytime-прогона ГА.
+
+    seconds - бюджет времени: поколение не начинается, если по длительности
+    предыдущего оно не успеет закончиться; evaluations - сколько симуляций
+    можно сделать; patience - сколько поколений подряд лучший результат
+    может не улучшаться больше чем на min_improvement. None - без ограничения.
+
+    state() сохраняет в контрольную точку ГА отсчёт оценок и застоя; бюджет
+    времени после продолжения (GeneticAlgorithm.resume) отсчитывается заново.
+    """
+
+    def __init__(self, seconds=None, evaluations=None, patience=None, min_improvement=0):
+        self.seconds = seconds
+        self.evaluations = evaluations
+        self.patience = patience
+        self.min_improvement = min_improvement
+        self.start()
+
+    def start(self, evaluations=0):
+        self.started = time.perf_counter()
+        self.last_check = self.started
+        self.first_evaluation = evaluations
+        self.best_fitness = None
+        self.stale = 0
+
+    def state(self):
+        return {"first_evaluation": self.first_evaluation, "best_fitness": self.best_fitness, "stale": self.stale}
+
+    def load_state(self, state):
+        self.first_evaluation = state["first_evaluation"]
+        self.best_fitness = state["best_fitness"]
+        self.stale = state["stale"]
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def used_evaluations(self, evaluations):
+        return evaluations - self.first_evaluation
+
+    def exhausted(self, best_fitness, evaluations):
+        """Вызывается после каждого поколения; возвращает причину остановки или None."""
+        now = time.perf_counter()
+        generation_time, self.last_check = now - self.last_check, now
+        if self.best_fitness is None or best_fitness > self.best_fitness + self.min_improvement:
+            self.best_fitness = best_fitness
+            self.stale = 0
+        else:
+            self.stale += 1
+        if self.seconds is not None and now - self.started + generation_time > self.seconds:
+            return TIME
+        if self.evaluations is not None and self.used_evaluations(evaluations) >= self.evaluations:
+            return EVALUATIONS
+        if self.patience is not None and self.stale >= self.patience:
+            return STAGNATION
+        return None
@@ -0,0 +1,32 @@
+import gzip
+import os
+import pickle
+
+CHECKPOINT_VERSION = 1
+
+
+def save_checkpoint(path, state):
+    """
+    Атомарно сохраняет состояние ГА (словарь) в path.
+
+    Данные пишутся во временный файл рядом с path и затем переименовываются,
+    поэтому прерванная запись не портит предыдущую контрольную точку.
+    Геномы занимают по три байта на водителя, а сжатие выбрано самое
+    быстрое, чтобы запись можно было делать каждое поколение.
+    """
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=1, mtime=0) as file:
+            pickle.dump(dict(state, version=CHECKPOINT_VERSION), file, protocol=pickle.HIGHEST_PROTOCOL)
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(temp_path, path)
+
+
+def load_checkpoint(path):
+    """Загружает состояние, сохранённое save_checkpoint."""
+    with gzip.open(path, "rb") as file:
+        state = pickle.load(file)
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Неподдерживаемая версия контрольной точки: {state.get('version')}")
+    return state
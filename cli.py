@@ -0,0 +1,123 @@
+"""
+Точки входа командной строки. Каждая команда импортирует только нужные ей
+модули, так что прогон расписания не загружает ГА и пулы процессов:
+
+    python cli.py simulate --log off --print-schedule
+    python cli.py optimise --generations 50 --seconds 120 --output best.json
+    python cli.py replay best.json --log jsonl --log-path replay.jsonl
+"""
+import argparse
+import random
+
+from tables import horizon_end
+
+
+def _network(args):
+    from network import default_network, load_network
+
+    return load_network(args.network) if args.network else default_network()
+
+
+def _report(args, roster=None):
+    """Прогон hands.simulate_buses с отчётом для simulate и replay."""
+    from hands import simulate_buses
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    network = _network(args)
+    passengers = None
+    if args.passengers:
+        from cohorts import CohortModel
+        passengers = CohortModel(network)
+    simulate_buses(args.print_schedule, args.log, args.log_path, horizon_end(args.days), network=network,
+                   passengers=passengers, roster=roster)
+
+
+def simulate(args):
+    _report(args)
+
+
+def replay(args):
+    from core import describe_drivers, drivers_from_genome
+    from hands import roster_from_genome
+    from network import load_roster
+
+    genome = load_roster(args.roster)
+    for schedule_entry in describe_drivers(drivers_from_genome(genome)):
+        print(schedule_entry)
+    _report(args, roster_from_genome(genome))
+
+
+def optimise(args):
+    from budget import Budget
+    from core import describe_drivers, drivers_from_genome
+    from genetik import GeneticAlgorithm
+    from network import save_roster
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    ga = GeneticAlgorithm(args.population, args.generations, args.mutation_rate, workers=args.workers,
+                          seed=args.seed, simulation_end_time=horizon_end(args.days), network=_network(args),
+                          deduplicate=args.deduplicate)
+    budget = None
+    if args.seconds is not None or args.evaluations is not None or args.patience is not None:
+        budget = Budget(args.seconds, args.evaluations, args.patience)
+    if args.resume:
+        best = ga.resume(args.checkpoint, args.checkpoint_every, budget)
+    else:
+        best = ga.evolve(args.checkpoint, args.checkpoint_every, budget)
+    print("Лучшее расписание найдено:")
+    for schedule_entry in describe_drivers(drivers_from_genome(best)):
+        print(schedule_entry)
+    if args.output:
+        save_roster(args.output, best)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Симуляция и оптимизация расписания водителей автобусов")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--days", type=int, default=7, help="Длительность симуляции, дни")
+    common.add_argument("--network", help="JSON с сетью маршрутов (см. network.py)")
+    common.add_argument("--seed", type=int, default=None)
+
+    report = argparse.ArgumentParser(add_help=False)
+    report.add_argument("--log", choices=("console", "jsonl", "csv", "off"), default="console",
+                        help="Журнал событий (см. eventlog.make_sink)")
+    report.add_argument("--log-path", help="Файл журнала для jsonl/csv")
+    report.add_argument("--print-schedule", action="store_true", help="Вывести расписание по остановкам")
+    report.add_argument("--passengers", action="store_true", help="Пассажиры с назначениями (cohorts.py)")
+
+    command = commands.add_parser("simulate", parents=[common, report],
+                                  help="Прогон ручного состава водителей (hands.default_roster)")
+    command.set_defaults(handler=simulate)
+
+    command = commands.add_parser("replay", parents=[common, report],
+                                  help="Прогон расписания, сохранённого optimise --output")
+    command.add_argument("roster", help="JSON с расписанием водителей (network.save_roster)")
+    command.set_defaults(handler=replay)
+
+    command = commands.add_parser("optimise", parents=[common], help="Поиск расписания генетическим алгоритмом")
+    command.add_argument("--population", type=int, default=100)
+    command.add_argument("--generations", type=int, default=100)
+    command.add_argument("--mutation-rate", type=float, default=0.1)
+    command.add_argument("--workers", type=int, default=None, help="Процессов для оценки (по умолчанию все ядра)")
+    command.add_argument("--deduplicate", action="store_true", help="Отсев повторов (population.py)")
+    command.add_argument("--seconds", type=float, default=None, help="Бюджет времени")
+    command.add_argument("--evaluations", type=int, default=None, help="Бюджет симуляций")
+    command.add_argument("--patience", type=int, default=None, help="Поколений без улучшения до остановки")
+    command.add_argument("--checkpoint", help="Файл контрольной точки")
+    command.add_argument("--checkpoint-every", type=int, default=1)
+    command.add_argument("--resume", action="store_true", help="Продолжить с контрольной точки")
+    command.add_argument("--output", help="JSON для лучшего расписания (для replay)")
+    command.set_defaults(handler=optimise)
+
+    args = parser.parse_args(argv)
+    if getattr(args, "resume", False) and not args.checkpoint:
+        parser.error("--resume требует --checkpoint")
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+Модель пассажиров с остановкой назначения (origin/destination).
+
+Пассажиры хранятся не поштучно, а когортами: (число, остановка отправления,
+минута появления) в очередях на массивах - по очереди на каждое назначение
+на остановке и в автобусе. Посадка и высадка работают с когортами целиком
+(головная когорта делится, если мест не хватает), поэтому стоимость
+прибытия зависит от числа когорт, а не пассажиров.
+
+Пассажир садится только в автобус, маршрут которого дальше по ходу (до
+конечной) проходит через его остановку назначения, и выходит на ней; на
+конечной, как и раньше, выходят все. Новые пассажиры появляются при
+прибытии автобуса в том же количестве, что и в исходной модели, и
+считаются пришедшими в середине интервала с предыдущего прибытия и
+раскладываются по назначениям мультиномиальным разбиением (биномиальная
+величина на каждое назначение), а если их меньше, чем назначений, -
+одной выборкой choices; стоимость не превышает числа назначений.
+
+Автобус, вышедший на линию после нерабочих часов водителя, начинает
+график с фактического прибытия (см. engine.EventSimulation), а не догоняет
+устаревший, проходя остановки раз в минуту, - иначе такие прибытия
+занижали бы время в пути и ожидание.
+
+    model = CohortModel(network)
+    for item in stream_buses(network=network, passengers=model):
+        ...
+    print(model.metrics.report())
+"""
+import heapq
+import random
+from array import array
+from itertools import accumulate
+from math import floor, lgamma, log, sqrt
+
+from network import default_network
+
+MAX_MINUTES = 24 * 60  # Ожидания и поездки дольше суток попадают в последний столбец гистограммы
+
+
+def binomial(rng, n, p):
+    """
+    Биномиальная случайная величина B(n, p) за O(1) в среднем (как
+    random.binomialvariate в Python 3.12): геометрический метод Деврая при
+    n * p < 10, иначе преобразованная выборка с отклонением BTRS (Hörmann).
+    """
+    if p <= 0.0 or n <= 0:
+        return 0
+    if p >= 1.0:
+        return n
+    if p > 0.5:
+        return n - binomial(rng, n, 1.0 - p)
+    if n * p < 10.0:
+        x = y = 0
+        c = log(1.0 - p)
+        if not c:
+            return x
+        while True:
+            y += floor(log(1.0 - rng.random()) / c) + 1
+            if y > n:
+                return x
+            x += 1
+    spq = sqrt(n * p * (1.0 - p))
+    b = 1.15 + 2.53 * spq
+    a = -0.0873 + 0.0248 * b + 0.01 * p
+    c = n * p + 0.5
+    vr = 0.92 - 4.2 / b
+    alpha = (2.83 + 5.1 / b) * spq
+    lpq = log(p / (1.0 - p))
+    m = floor((n + 1) * p)  # Мода распределения
+    h = lgamma(m + 1) + lgamma(n - m + 1)
+    while True:
+        u = rng.random() - 0.5
+        us = 0.5 - abs(u)
+        k = floor((2.0 * a / us + b) * u + c)
+        if k < 0 or k > n:
+            continue
+        v = rng.random()
+        if us >= 0.07 and v <= vr:
+            return k
+        v *= alpha / (a / (us * us) + b)
+        if v > 0 and log(v) <= h - lgamma(k + 1) - lgamma(n - k + 1) + (k - m) * lpq:
+            return k
+
+
+class CohortQueue:
+    """Очередь когорт FIFO на трёх параллельных массивах."""
+
+    __slots__ = ("counts", "origins", "minutes", "head", "total")
+
+    def __init__(self):
+        self.counts = array("l")
+        self.origins = array("i")
+        self.minutes = array("l")
+        self.head = 0
+        self.total = 0  # Пассажиров в очереди
+
+    def __len__(self):
+        return len(self.counts) - self.head
+
+    def push(self, count, origin, minute):
+        self.counts.append(count)
+        self.origins.append(origin)
+        self.minutes.append(minute)
+        self.total += count
+
+    def first_minute(self):
+        return self.minutes[self.head]
+
+    def take(self, limit):
+        """Снимает с головы до limit пассажиров; возвращает список когорт (число, откуда, минута)."""
+        taken = []
+        while limit > 0 and self.head < len(self.counts):
+            head = self.head
+            count = self.counts[head]
+            if count > limit:
+                self.counts[head] = count - limit  # Когорта делится: часть остаётся ждать
+                count = limit
+            else:
+                self.head += 1
+            taken.append((count, self.origins[head], self.minutes[head]))
+            self.total -= count
+            limit -= count
+        self._compact()
+        return taken
+
+    def drain(self):
+        return self.take(self.total)
+
+    def _compact(self):
+        head = self.head
+        if head == len(self.counts):
+            del self.counts[:], self.origins[:], self.minutes[:]
+            self.head = 0
+        elif head > 64 and head * 2 > len(self.counts):
+            del self.counts[:head], self.origins[:head], self.minutes[:head]
+            self.head = 0
+
+
+class CohortMetrics:
+    """Гистограммы ожидания и времени в пути (по минутам, с весом - числом пассажиров)."""
+
+    def __init__(self, max_minutes=MAX_MINUTES):
+        self.max_minutes = max_minutes
+        self.wait = array("q", bytes(8 * (max_minutes + 1)))
+        self.ride = array("q", bytes(8 * (max_minutes + 1)))
+        self.generated = 0
+        self.boarded = 0
+        self.alighted = 0
+        self.denied = 0  # Не поместились в автобус, идущий к их остановке (по каждому такому автобусу)
+
+    def add(self, histogram, minutes, count):
+        histogram[min(minutes, self.max_minutes)] += count
+
+    @staticmethod
+    def mean(histogram):
+        total = sum(histogram)
+        return sum(minute * count for minute, count in enumerate(histogram)) / total if total else 0.0
+
+    @staticmethod
+    def percentile(histogram, q):
+        """Наименьшая минута, до которой включительно набирается q процентов пассажиров."""
+        total = sum(histogram)
+        if not total:
+            return 0
+        threshold = total * q / 100
+        cumulative = 0
+        for minute, count in enumerate(histogram):
+            cumulative += count
+            if cumulative >= threshold:
+                return minute
+        return len(histogram) - 1
+
+    def summary(self):
+        result = {"generated": self.generated, "boarded": self.boarded, "alighted": self.alighted,
+                  "denied": self.denied}
+        for name, histogram in (("wait", self.wait), ("ride", self.ride)):
+            result[name] = {"mean": self.mean(histogram),
+                            **{f"p{q}": self.percentile(histogram, q) for q in (50, 90, 95, 99)}}
+        return result
+
+    def report(self):
+        summary = self.summary()
+        lines = ["--- Пассажиры по назначениям ---",
+                 f"Появилось: {summary['generated']}, село: {summary['boarded']}, доехало: {summary['alighted']}, "
+                 f"не поместилось в автобус: {summary['denied']}"]
+        for name, title in (("wait", "Ожидание"), ("ride", "В пути")):
+            stats = summary[name]
+            lines.append(f"{title}: в среднем {stats['mean']:.1f} мин, медиана {stats['p50']} мин, "
+                         f"p90 {stats['p90']} мин, p99 {stats['p99']} мин")
+        return "\n".join(lines)
+
+
+class CohortModel:
+    """
+    Состояние пассажиров одного прогона (для engine.EventSimulation(passengers=...)).
+
+    od_weights - {остановка отправления: {остановка назначения: вес}} по
+    именам; по умолчанию назначение равновероятно среди остановок, куда
+    можно доехать без пересадки. rng - источник случайных чисел.
+    """
+
+    def __init__(self, network=None, od_weights=None, rng=random, max_minutes=MAX_MINUTES):
+        self.network = network or default_network()
+        self.rng = rng
+        self.metrics = CohortMetrics(max_minutes)
+        network = self.network
+        # Остановки дальше по ходу до конечной для каждой позиции каждого маршрута
+        self.downstream = []
+        reachable = [set() for _ in range(network.num_stops)]
+        for route in network.routes:
+            stops = route.stops
+            last = len(stops) - 1
+            positions = []
+            for position, stop in enumerate(stops):
+                ahead = stops[position + 1:] if position < last else stops[:last]
+                targets = frozenset(ahead) - {stop}
+                positions.append(targets)
+                reachable[stop] |= targets
+            self.downstream.append(positions)
+        # Назначения с положительным весом, их веса с остатком веса до конца списка
+        # и накопленные веса (для choices)
+        self.destinations = []
+        self.weights = []
+        self.cum_weights = []
+        for origin, targets in enumerate(reachable):
+            targets = sorted(targets)
+            if od_weights is None:
+                weights = [1] * len(targets)
+            else:
+                row = od_weights.get(network.stop_names[origin], {})
+                weights = [row.get(network.stop_names[target], 0) for target in targets]
+            pairs = [(target, weight) for target, weight in zip(targets, weights) if weight > 0]
+            weights = [weight for _, weight in pairs]
+            self.destinations.append([target for target, _ in pairs])
+            self.weights.append(list(zip(weights, reversed(list(accumulate(reversed(weights)))))))
+            self.cum_weights.append(list(accumulate(weights)))
+        self.stop_queues = [{} for _ in range(network.num_stops)]  # назначение -> CohortQueue
+        self.bus_queues = [{} for _ in range(network.num_buses)]
+        self.last_visit = [0] * network.num_stops
+        self.stops = self.buses = None
+
+    def attach(self, simulation):
+        """Связывает модель с симуляцией; начальные ожидающие становятся когортами минуты 0."""
+        if len(simulation.bus_stops) != self.network.num_stops or len(simulation.buses) != self.network.num_buses:
+            raise ValueError("Модель пассажиров построена для другой сети")
+        self.stops = simulation.bus_stops
+        self.buses = simulation.buses
+        for origin, stop in enumerate(self.stops):
+            stop.waiting_passengers = self._generate(origin, stop.waiting_passengers, 0)
+
+    def _generate(self, origin, count, minute):
+        """Раскладывает count новых пассажиров по назначениям; возвращает, сколько встало в очередь."""
+        targets = self.destinations[origin]
+        if not count or not targets:
+            return 0
+        rng = self.rng
+        if count < len(targets):
+            by_target = {}
+            for target in rng.choices(targets, cum_weights=self.cum_weights[origin], k=count):
+                by_target[target] = by_target.get(target, 0) + 1
+            sizes = by_target.items()
+        else:
+            sizes = self._split(targets, self.weights[origin], count)
+        queues = self.stop_queues[origin]
+        for target, size in sizes:
+            queue = queues.get(target)
+            if queue is None:
+                queue = queues[target] = CohortQueue()
+            queue.push(size, origin, minute)
+        self.metrics.generated += count
+        return count
+
+    def _split(self, targets, weights, count):
+        """Мультиномиальное разбиение: назначение получает B(остаток, вес / остаток веса)."""
+        rng = self.rng
+        remaining = count
+        for target, (weight, left) in zip(targets, weights):
+            size = remaining if weight >= left else binomial(rng, remaining, weight / left)
+            if size:
+                yield target, size
+                remaining -= size
+                if not remaining:
+                    return
+
+    def exchange(self, i, position, minute, band, is_final_stop):
+        """
+        Прибытие автобуса i на позицию position своего маршрута: новые
+        пассажиры, высадка, посадка. Возвращает (высажено, подобрано) и
+        обновляет waiting_passengers остановки и current_load автобуса.
+        """
+        metrics = self.metrics
+        route = self.network.bus_route[i]
+        origin = self.network.routes[route].stops[position]
+        stop = self.stops[origin]
+        bus = self.buses[i]
+
+        # Новые пассажиры пришли в среднем посередине интервала с прошлого прибытия
+        count = self.rng.randint(*stop.demand_ranges[band])
+        stop.waiting_passengers += self._generate(origin, count, (self.last_visit[origin] + minute) // 2)
+        self.last_visit[origin] = minute
+
+        # Высадка: на своей остановке, на конечной - все
+        bus_queues = self.bus_queues[i]
+        if is_final_stop:
+            leaving = [cohort for queue in bus_queues.values() for cohort in queue.drain()]
+        else:
+            queue = bus_queues.get(origin)
+            leaving = queue.drain() if queue is not None else []
+        dropped_off = 0
+        for size, _, boarded_at in leaving:
+            metrics.add(metrics.ride, minute - boarded_at, size)
+            dropped_off += size
+        metrics.alighted += dropped_off
+        bus.current_load -= dropped_off
+
+        # Посадка в порядке появления среди тех, кому по пути
+        free = bus.capacity - bus.current_load
+        targets = self.downstream[route][position]
+        stop_queues = self.stop_queues[origin]
+        heads = [(queue.first_minute(), target) for target, queue in stop_queues.items()
+                 if queue.total and target in targets]
+        heapq.heapify(heads)
+        picked_up = 0
+        while heads and free > 0:
+            _, target = heapq.heappop(heads)
+            queue = stop_queues[target]
+            for size, from_stop, arrived_at in queue.take(min(free, queue.counts[queue.head])):
+                metrics.add(metrics.wait, minute - arrived_at, size)
+                target_queue = bus_queues.get(target)
+                if target_queue is None:
+                    target_queue = bus_queues[target] = CohortQueue()
+                target_queue.push(size, from_stop, minute)
+                picked_up += size
+                free -= size
+            if queue.total:
+                heapq.heappush(heads, (queue.first_minute(), target))
+        metrics.denied += sum(stop_queues[target].total for _, target in heads)
+        metrics.boarded += picked_up
+        bus.current_load += picked_up
+        stop.waiting_passengers -= picked_up
+        return dropped_off, picked_up
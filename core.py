@@ -0,0 +1,203 @@
+"""
+Общее ядро симуляции: автобусы, остановки, водители и прогон расписания.
+
+Модуль не выполняет никакой работы при импорте и не тянет за собой ГА,
+пулы процессов и отчёты, поэтому рабочие процессы (parallel.py,
+montecarlo.py) и сторонние инструменты запускаются быстро. Его используют
+и ГА (genetik.py), и ручной прогон с отчётом (hands.py).
+"""
+import random
+from datetime import time, timedelta
+
+from engine import EventSimulation
+from genome import WORK_DAYS, shift_window
+from network import default_network
+from tables import DEMAND_RANGES, SIMULATION_END, SIMULATION_START, TRAVEL_RANGES, WEEKDAY_NAMES, hour_band
+
+class Bus:
+    def __init__(self, bus_number, capacity, rng=random):
+        self.bus_number = bus_number
+        self.capacity = capacity
+        self.current_load = 0
+        self.rng = rng  # Источник случайных чисел для высадки
+
+    def pickup_passengers(self, waiting_passengers):
+        passengers_to_pickup = min(waiting_passengers, self.capacity - self.current_load)
+        self.current_load += passengers_to_pickup
+        return passengers_to_pickup
+
+    def drop_off_passengers(self, is_final_stop):
+        if is_final_stop:
+            passengers_to_drop = self.current_load  # Высаживаем всех
+            self.current_load = 0  # Все пассажиры выходят
+        else:
+            if self.rng.random() < 0.6:  # 60% вероятность высадки
+                passengers_to_drop = self.rng.randint(0, self.current_load)
+                self.current_load -= passengers_to_drop
+            else:
+                passengers_to_drop = 0
+        return passengers_to_drop
+
+
+class BusStop:
+    def __init__(self, name, rng=random, demand_ranges=DEMAND_RANGES):
+        self.name = name
+        self.rng = rng  # Источник случайных чисел для спроса
+        self.waiting_passengers = rng.randint(0, 66)
+        self.demand_ranges = demand_ranges  # Новые пассажиры по интервалам суток
+
+    def update_waiting_passengers(self, current_time):
+        # Добавляем пассажиров в зависимости от времени суток
+        self.add_waiting_passengers(hour_band(current_time.hour))
+
+    def add_waiting_passengers(self, band):
+        new_passengers = self.rng.randint(*self.demand_ranges[band])
+        self.waiting_passengers += new_passengers
+        self.waiting_passengers = max(0, self.waiting_passengers)
+
+
+class Driver:
+    def __init__(self, name, driver_type, schedule, start_day=None):
+        self.name = name
+        self.driver_type = driver_type
+        self.schedule = schedule
+        self.has_taken_break = False
+        self.is_on_break = False
+        self.break_start_time = None
+        self.day_counter = 0
+        self.start_day = start_day  # День начала работы для водителей второго типа
+        self.shift_ended = False  # Новый флаг для отслеживания завершения смены
+
+    def is_working(self, current_time):
+        weekday = current_time.weekday()
+        if weekday >= len(self.schedule) or self.schedule[weekday] is None:
+            return False
+        start_time, end_time = self.schedule[weekday]
+        return start_time <= current_time.time() <= end_time
+
+    def can_drive(self, current_time):
+        # Для водителей второго типа проверяем цикл через 3 дня
+        if self.driver_type == 2:
+            if self.start_day is not None:
+                days_since_start = (current_time.date() - self.start_day).days
+                if days_since_start < 0 or (days_since_start % 3) != 0:
+                    return False
+        return self.is_working(current_time) and not self.is_on_break
+
+    def start_break(self, current_time):
+        self.is_on_break = True
+        self.break_start_time = current_time
+
+    def end_break(self, current_time):
+        if self.is_on_break:
+            break_duration = 60 if self.driver_type == 1 else 15
+            if current_time >= self.break_start_time + timedelta(minutes=break_duration):
+                self.is_on_break = False
+                self.break_start_time = None
+                return True  # Перерыв завершён
+        return False
+
+    def check_end_of_shift(self, current_time):
+        weekday = current_time.weekday()
+        if weekday >= len(self.schedule) or self.schedule[weekday] is None:
+            return False
+
+        _, end_time = self.schedule[weekday]
+        if current_time.time() >= end_time and self.is_working(current_time) and not self.shift_ended:
+            self.shift_ended = True  # Устанавливаем флаг завершения смены
+            return True
+        elif current_time.time() < end_time:
+            self.shift_ended = False  # Смена еще не завершена, сбрасываем флаг
+        return False
+
+
+def travel_time(current_time):
+    return random.randint(*TRAVEL_RANGES[hour_band(current_time.hour)])
+
+
+def get_weekday_name(date):
+    return WEEKDAY_NAMES[date.weekday()]
+
+
+def describe_drivers(drivers):
+    """Строки с различными сменами водителей (для вывода лучшего расписания)."""
+    unique_schedules = []
+    for driver in drivers:
+        driver_type = "типа 1" if driver.driver_type == 1 else "типа 2"
+        for day_schedule in driver.schedule:
+            if day_schedule is not None:
+                start_time, end_time = day_schedule
+                if driver.driver_type == 2 and driver.start_day is not None:
+                    start_weekday = get_weekday_name(driver.start_day)
+                    schedule_entry = (
+                        f"{driver.name} {driver_type} (начало смены {start_time}, конец смены {end_time}, "
+                        f"начальный день {start_weekday} ({driver.start_day}))")
+                else:
+                    schedule_entry = f"{driver.name} {driver_type} (начало смены {start_time}, конец смены {end_time})"
+
+                if schedule_entry not in unique_schedules:
+                    unique_schedules.append(schedule_entry)
+    return unique_schedules
+
+
+def drivers_from_genome(genome):
+    """Создаёт новых водителей (без состояния перерывов) по геному."""
+    drivers = []
+    for i, (driver_type, slot, _) in enumerate(genome):
+        start_minute, end_minute = shift_window(driver_type, slot)
+        start_time = time(start_minute // 60, start_minute % 60)
+        end_time = time(end_minute // 60, end_minute % 60)
+        schedule = [(start_time, end_time)] * WORK_DAYS[driver_type] + [None] * (7 - WORK_DAYS[driver_type])
+        drivers.append(Driver(f"Кентик {i + 1}", driver_type, schedule, genome.start_day(i)))
+    return drivers
+
+
+def simulate_schedule(schedule, simulation_end_time=SIMULATION_END, stats=None, crn_seed=None,
+                      network=None, passengers=None, state=None):
+    """Вычисляет общее количество перевезённых пассажиров для данного расписания (см. build_simulation)."""
+    return build_simulation(schedule, simulation_end_time, stats, crn_seed, network, passengers, state).run()
+
+
+def build_simulation(schedule, simulation_end_time=SIMULATION_END, stats=None, crn_seed=None,
+                     network=None, passengers=None, state=None):
+    """
+    Симуляция (engine.EventSimulation) расписания schedule - списка водителей.
+
+    network (network.Network) задаёт остановки, маршруты и парки; водитель i
+    ведёт автобус i, так что водителей должно быть столько же, сколько
+    автобусов. По умолчанию - исходное кольцо из 8 остановок. Все автобусы
+    выходят на линию в начале симуляции.
+
+    Если задан crn_seed, у каждой остановки и каждого автобуса свой поток
+    случайных чисел, засеянный от crn_seed (общие случайные числа для
+    сравнения расписаний), а глобальный random не используется.
+    passengers - модель пассажиров с назначениями (cohorts.CohortModel).
+
+    state (replan.FleetState) - продолжение с середины: симуляция идёт от
+    state.now с ожидающими, загрузкой, позициями автобусов и перерывами
+    водителей из state.
+    """
+    network = network or default_network(len(schedule))
+    if network.num_buses != len(schedule):
+        raise ValueError(f"Водителей {len(schedule)}, а автобусов в сети {network.num_buses}")
+    if crn_seed is None:
+        stop_streams = [random] * network.num_stops
+        bus_streams = [random] * network.num_buses
+    else:
+        stop_streams = [random.Random(f"{crn_seed}:stop:{i}") for i in range(network.num_stops)]
+        bus_streams = [random.Random(f"{crn_seed}:bus:{i}") for i in range(network.num_buses)]
+    bus_stops = [BusStop(name, stream) for name, stream in zip(network.stop_names, stop_streams)]  # Остановки
+    buses = [Bus(f"{100 + i}", capacity, bus_streams[i])                                         # Автобусы
+             for i, capacity in enumerate(network.capacities())]
+    current_time = SIMULATION_START  # Начало симуляции
+    bus_schedule = [current_time] * len(buses)   # Время прибытия
+    bus_positions = None
+    if state is not None:
+        current_time = state.now
+        bus_schedule = list(state.bus_schedule)
+        bus_positions = state.positions
+        state.apply(bus_stops, buses, schedule)
+
+    return EventSimulation(bus_stops, buses, schedule, bus_schedule, current_time, simulation_end_time,
+                           stats=stats, travel_streams=bus_streams, bus_routes=network.bus_routes(),
+                           passengers=passengers, bus_positions=bus_positions)
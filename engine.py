@@ -0,0 +1,367 @@
+import heapq
+import random
+from array import array
+from collections import namedtuple
+from datetime import timedelta
+
+import eventlog
+from tables import TRAVEL_RANGES, horizon_tables
+
+# Виды событий. При совпадении времени и автобуса события обрабатываются
+# в порядке возрастания вида - так же, как в старом поминутном цикле:
+# сначала проверка конца смены, потом перерыв или прибытие.
+DAY_START = 0
+SHIFT_CHECK = 0
+BREAK_END = 1
+ARRIVAL = 2
+
+# Снимок состояния симуляции (см. EventSimulation.save_state)
+SavedState = namedtuple("SavedState", "queue requested bus_schedule bus_positions transported waiting loads "
+                                      "drivers streams")
+
+
+class EventSimulation:
+    """
+    Событийная симуляция движения автобусов по кольцевым маршрутам.
+
+    Вместо перебора каждой минуты недели в очереди с приоритетом лежат только
+    моменты, когда что-то происходит: прибытия автобусов, окончания перерывов,
+    начала и концы смен. Время внутри хранится в минутах от начала симуляции.
+    События одной минуты обрабатываются в порядке номеров автобусов, поэтому
+    случайные числа расходуются в том же порядке, что и в поминутном цикле,
+    и при одинаковом seed результат совпадает с ним до пассажира.
+
+    Всё, что зависит только от минуты (интервал суток, обеденное окно,
+    доступность водителей), берётся из заранее построенных tables.HorizonTables.
+    Водители с одинаковым расписанием делят одну битовую карту доступности.
+
+    bus_routes[i] - индексы остановок маршрута автобуса i по порядку
+    (см. network.Network.bus_routes); по умолчанию все автобусы ходят по
+    одному кольцу через все остановки bus_stops.
+
+    passengers - модель пассажиров с назначениями (cohorts.CohortModel);
+    без неё пассажиры - просто числа на остановках и в автобусах. С моделью
+    график автобуса, прибывшего позже графика (после нерабочих часов водителя
+    или перерыва), начинается заново с фактического прибытия: иначе он
+    догоняет устаревший график, проходя остановки с интервалом в минуту, и
+    портит распределения ожидания и времени в пути. Без модели поведение
+    прежнее, чтобы не менять приспособленность расписаний.
+
+    Если задан sink (см. eventlog), в него пишутся события прибытий, перерывов
+    и концов смен; без него записи событий не создаются вовсе. Аналогично
+    stats (см. stats.SimStats) включает счётчики событий, прибытий по
+    остановкам, отказов can_drive и перерывов.
+
+    save_state() и restore_state() снимают и восстанавливают полное
+    состояние между вызовами run_until, в том числе на симуляции с другими
+    водителями, если до момента снимка они работали так же.
+    """
+
+    def __init__(self, bus_stops, buses, drivers, bus_schedule, start_time, end_time,
+                 daily_break_reset=False, on_arrival=None, sink=None, stats=None, travel_streams=None,
+                 bus_routes=None, passengers=None, bus_positions=None):
+        self.bus_stops = bus_stops
+        self.buses = buses
+        self.drivers = drivers
+        self.start_time = start_time
+        self.end_time = end_time
+        self.daily_break_reset = daily_break_reset  # Сброс обеденного флага в полночь
+        self.on_arrival = on_arrival                # on_arrival(current_time, i, stop, dropped_off, picked_up)
+        self.sink = sink                            # Журнал событий или None
+        self.stats = stats if stats is not None and stats.enabled else None
+        # Источники случайного времени в пути по автобусам (по умолчанию общий random)
+        self.travel_streams = travel_streams or [random] * len(buses)
+
+        self.tables = horizon_tables(start_time, end_time)
+        self.horizon = self.tables.horizon
+        self.bus_routes = bus_routes or [range(len(bus_stops))] * len(buses)
+        availability = {}
+        self.availability = []
+        for driver in drivers:
+            key = (driver.driver_type, tuple(driver.schedule), driver.start_day)
+            if key not in availability:
+                availability[key] = self.tables.availability(driver)
+            self.availability.append(availability[key])
+        self.bus_schedule = [self._to_minutes(t) for t in bus_schedule]  # Время прибытия, мин
+        self.bus_positions = list(bus_positions or [0] * len(buses))  # Позиции на маршрутах
+        # Запрошенная минута ожидаемого прибытия по автобусам (None - автобус на перерыве)
+        self.requested = [None] * len(buses)
+        self.total_passengers_transported = 0
+        self.queue = []
+        self.started = False
+        self.passengers = passengers
+        if passengers is not None:
+            passengers.attach(self)
+
+    def _to_minutes(self, moment):
+        return -(-(moment - self.start_time) // timedelta(minutes=1))  # Округление вверх
+
+    def next_drive_minute(self, i, minute):
+        """Первая минута не раньше minute, когда водитель i может вести автобус."""
+        if minute >= self.horizon:
+            return None
+        minute = self.availability[i].find(1, minute)
+        return minute if minute >= 0 else None
+
+    def _push(self, minute, i, kind):
+        if minute is not None and 0 <= minute < self.horizon:
+            heapq.heappush(self.queue, (minute, i, kind))
+
+    def _push_arrival(self, i, minute):
+        self.requested[i] = minute
+        next_minute = self.next_drive_minute(i, minute)
+        if self.stats is not None and next_minute != minute:
+            self.stats.count("can_drive_rejections")  # Водитель не на смене, прибытие откладывается
+        self._push(next_minute, i, ARRIVAL)
+
+    def _push_break_end(self, i):
+        self.requested[i] = None
+        driver = self.drivers[i]
+        break_duration = 60 if driver.driver_type == 1 else 15
+        minute = self._to_minutes(driver.break_start_time + timedelta(minutes=break_duration))
+        self._push(max(minute, 0), i, BREAK_END)
+
+    def _initial_events(self):
+        if self.started:
+            return
+        self.started = True
+        tables = self.tables
+        if self.daily_break_reset:
+            for day in range(1, tables.num_days):
+                self._push(tables.day_start(day), -1, DAY_START)
+        if self.sink is not None:
+            for i, driver in enumerate(self.drivers):
+                for day in range(tables.num_days):
+                    window = tables.window(driver, day, check_cycle=False)
+                    if window is not None:
+                        self._push(max(tables.day_start(day) + window[0], 0), i, SHIFT_CHECK)
+                        self._push(tables.day_start(day) + window[1], i, SHIFT_CHECK)
+        for i, driver in enumerate(self.drivers):
+            if driver.is_on_break:
+                self._push_break_end(i)
+            else:
+                # Отставший от графика автобус (при продолжении с середины) прибывает сразу
+                self._push_arrival(i, max(self.bus_schedule[i], 0))
+
+    def run(self):
+        """
+        Прогоняет симуляцию до конца (или продолжает после run_until)
+        и возвращает число перевезённых пассажиров.
+        """
+        self._initial_events()
+        queue = self.queue
+        events = 0
+        while queue:
+            self._handle(*heapq.heappop(queue))
+            events += 1
+        self._count_run(events)
+        return self.total_passengers_transported
+
+    def run_until(self, minute):
+        """Обрабатывает все события раньше минуты minute; run() потом продолжает с неё."""
+        self._initial_events()
+        queue = self.queue
+        events = 0
+        while queue and queue[0][0] < minute:
+            self._handle(*heapq.heappop(queue))
+            events += 1
+        if self.stats is not None:
+            self.stats.count("events", events)
+        return self.total_passengers_transported
+
+    def stream(self, snapshot_interval=None):
+        """
+        Та же симуляция в виде генератора: выдаёт события eventlog.SimEvent
+        по мере обработки и, если задан snapshot_interval (мин), снимки
+        eventlog.StateSnapshot на начало каждого интервала; последний снимок
+        выдаётся после окончания симуляции. Генератор можно бросить на
+        середине. События также пишутся в sink, если он задан.
+        """
+        outer_sink = self.sink
+        buffer = self.sink = eventlog.BufferSink()
+        self._initial_events()
+        queue = self.queue
+        events = 0
+        next_snapshot = 0 if snapshot_interval else None
+        try:
+            while queue:
+                minute, i, kind = heapq.heappop(queue)
+                while next_snapshot is not None and next_snapshot <= minute:
+                    yield self.snapshot(next_snapshot)
+                    next_snapshot += snapshot_interval
+                self._handle(minute, i, kind)
+                events += 1
+                for event in buffer.events:
+                    if outer_sink is not None:
+                        outer_sink.write(event)
+                    yield event
+                buffer.events.clear()
+            self._count_run(events)
+            yield self.snapshot(self.horizon)
+        finally:
+            self.sink = outer_sink
+
+    def snapshot(self, minute):
+        return eventlog.StateSnapshot(
+            eventlog.SNAPSHOT, minute, self.total_passengers_transported,
+            tuple(stop.waiting_passengers for stop in self.bus_stops),
+            tuple(bus.current_load for bus in self.buses), tuple(self.bus_positions))
+
+    def save_state(self):
+        """
+        Компактный снимок полного состояния (обычно после run_until): очередь
+        событий, графики и позиции автобусов, ожидающие, загрузка, перерывы
+        водителей и состояние генераторов случайных чисел.
+        """
+        if self.passengers is not None:
+            raise ValueError("Снимки состояния с моделью пассажиров не поддерживаются")
+        return SavedState(
+            tuple(event for event in self.queue if event[2] != ARRIVAL), tuple(self.requested),
+            tuple(self.bus_schedule), tuple(self.bus_positions), self.total_passengers_transported,
+            tuple(stop.waiting_passengers for stop in self.bus_stops), tuple(bus.current_load for bus in self.buses),
+            tuple((driver.is_on_break, driver.break_start_time, driver.has_taken_break, driver.shift_ended)
+                  for driver in self.drivers),
+            tuple(_pack_random(stream) for stream in self._streams()))
+
+    def restore_state(self, saved):
+        """
+        Продолжает симуляцию с состояния saved; после этого run_until и run
+        идут дальше как в симуляции, с которой снят снимок.
+
+        Ожидаемые прибытия пересчитываются по доступности водителей этой
+        симуляции, поэтому снимок годится для любого расписания, совпадающего
+        с исходным до момента снимка (проверки концов смен для журнала берутся
+        из снимка как есть).
+        """
+        streams = self._streams()
+        if len(saved.streams) != len(streams) or len(saved.requested) != len(self.buses):
+            raise ValueError("Снимок снят с симуляции другой конфигурации")
+        self.started = True
+        self.queue = list(saved.queue)
+        heapq.heapify(self.queue)
+        self.bus_schedule = list(saved.bus_schedule)
+        self.bus_positions = list(saved.bus_positions)
+        self.total_passengers_transported = saved.transported
+        for stop, waiting in zip(self.bus_stops, saved.waiting):
+            stop.waiting_passengers = waiting
+        for bus, load in zip(self.buses, saved.loads):
+            bus.current_load = load
+        for driver, (on_break, break_start_time, lunch_taken, shift_ended) in zip(self.drivers, saved.drivers):
+            driver.is_on_break = on_break
+            driver.break_start_time = break_start_time
+            driver.has_taken_break = lunch_taken
+            driver.shift_ended = shift_ended
+        for stream, packed in zip(streams, saved.streams):
+            _unpack_random(stream, packed)
+        self.requested = list(saved.requested)
+        for i, minute in enumerate(self.requested):
+            if minute is not None:
+                self._push(self.next_drive_minute(i, minute), i, ARRIVAL)
+
+    def _streams(self):
+        """Различные источники случайных чисел симуляции в постоянном порядке."""
+        streams = {}
+        for stream in (*self.travel_streams, *(getattr(item, "rng", random) for item in self.bus_stops),
+                       *(getattr(item, "rng", random) for item in self.buses)):
+            streams.setdefault(id(stream), stream)
+        return list(streams.values())
+
+    def _handle(self, minute, i, kind):
+        if kind == ARRIVAL:
+            self._arrive(i, minute)
+        elif i < 0:
+            # Сброс обеденного флага в начале нового дня
+            for driver in self.drivers:
+                if driver.driver_type == 1:
+                    driver.has_taken_break = False
+        elif kind == SHIFT_CHECK:
+            if self.drivers[i].check_end_of_shift(self.tables.to_datetime(minute)):
+                self._log_driver(eventlog.SHIFT_END, minute, i)
+        else:
+            driver = self.drivers[i]
+            if driver.end_break(self.tables.to_datetime(minute)):
+                if self.stats is not None:
+                    self.stats.count("break_ends")
+                if self.sink is not None:
+                    self._log_driver(eventlog.LUNCH_END if driver.driver_type == 1 else eventlog.BREAK_END,
+                                     minute, i)
+            self._push_arrival(i, max(self.bus_schedule[i], minute + 1))
+
+    def _count_run(self, events):
+        if self.stats is not None:
+            self.stats.count("simulations")
+            self.stats.count("events", events)
+
+    def _arrive(self, i, minute):
+        bus = self.buses[i]
+        driver = self.drivers[i]
+        band = self.tables.band[minute]
+        route = self.bus_routes[i]
+        current_stop_index = self.bus_positions[i]  # Позиция на маршруте
+        is_final_stop = (current_stop_index == len(route) - 1)
+        stop = self.bus_stops[route[current_stop_index]]
+
+        if self.passengers is None:
+            # Обновляем пассажиров на остановке
+            stop.add_waiting_passengers(band)
+
+            # Высадка и посадка пассажиров
+            dropped_off = bus.drop_off_passengers(is_final_stop)
+            picked_up = bus.pickup_passengers(stop.waiting_passengers)
+            stop.waiting_passengers -= picked_up
+        else:
+            dropped_off, picked_up = self.passengers.exchange(i, current_stop_index, minute, band, is_final_stop)
+            if self.bus_schedule[i] < minute:
+                self.bus_schedule[i] = minute  # Опоздавший автобус не догоняет старый график
+        self.total_passengers_transported += dropped_off
+        if self.on_arrival is not None:
+            self.on_arrival(self.tables.to_datetime(minute), i, stop, dropped_off, picked_up)
+        if self.stats is not None:
+            self.stats.count(f"arrivals:{stop.name}")
+        if self.sink is not None:
+            self.sink.write(eventlog.SimEvent(
+                eventlog.ARRIVAL, minute, bus.bus_number, driver.name, stop.name,
+                stop.waiting_passengers + picked_up, picked_up, dropped_off, bus.current_load, bus.capacity))
+
+        # Проверяем обеденный перерыв (только для первого типа водителей)
+        if is_final_stop and driver.driver_type == 1 and not driver.has_taken_break and not driver.is_on_break:
+            if self.tables.lunch[minute]:
+                self._start_break(i, minute)
+                driver.has_taken_break = True
+                self.bus_schedule[i] += 60
+
+        if is_final_stop and driver.driver_type == 2 and not driver.is_on_break:
+            self._start_break(i, minute)  # 15-ти минутный перерыв
+            self.bus_schedule[i] += 15
+
+        # Переходим к следующей остановке
+        self.bus_positions[i] = (current_stop_index + 1) % len(route)
+        self.bus_schedule[i] += self.travel_streams[i].randint(*TRAVEL_RANGES[band])
+
+        # Автобус обрабатывается не чаще раза в минуту, даже если отстал от графика
+        if driver.is_on_break:
+            self._push_break_end(i)
+        else:
+            self._push_arrival(i, max(self.bus_schedule[i], minute + 1))
+
+    def _start_break(self, i, minute):
+        driver = self.drivers[i]
+        driver.start_break(self.tables.to_datetime(minute))
+        if self.stats is not None:
+            self.stats.count("break_starts")
+        if self.sink is not None:
+            self._log_driver(eventlog.LUNCH_START if driver.driver_type == 1 else eventlog.BREAK_START, minute, i)
+
+    def _log_driver(self, kind, minute, i):
+        self.sink.write(eventlog.driver_event(kind, minute, self.buses[i].bus_number, self.drivers[i].name))
+
+
+def _pack_random(stream):
+    """Состояние генератора Mersenne Twister в виде массива (в несколько раз меньше кортежа)."""
+    version, internal, gauss_next = stream.getstate()
+    return version, array("I", internal), gauss_next
+
+
+def _unpack_random(stream, packed):
+    version, internal, gauss_next = packed
+    stream.setstate((version, tuple(internal), gauss_next))
@@ -0,0 +1,154 @@
+import csv
+import json
+import sys
+from collections import namedtuple
+from datetime import timedelta
+
+from tables import WEEKDAY_NAMES
+
+# Виды событий симуляции
+ARRIVAL = "arrival"          # Автобус прибыл на остановку
+LUNCH_START = "lunch_start"  # Водитель первого типа ушёл на обед
+LUNCH_END = "lunch_end"
+BREAK_START = "break_start"  # Водитель второго типа ушёл на 15-минутный перерыв
+BREAK_END = "break_end"
+SHIFT_END = "shift_end"      # Водитель завершил смену
+SNAPSHOT = "snapshot"        # Периодический снимок состояния (StateSnapshot)
+
+# minute - минута от начала симуляции, waiting - ожидающие до посадки.
+# Для событий водителей поля остановки и пассажиров не заполняются.
+SimEvent = namedtuple("SimEvent", "kind minute bus driver stop waiting picked_up dropped_off load capacity")
+
+# Состояние на начало минуты minute: перевезено всего, ожидающие по остановкам,
+# загрузка и позиция на маршруте по автобусам (кортежи в порядке симуляции).
+StateSnapshot = namedtuple("StateSnapshot", "kind minute transported waiting loads positions")
+
+
+def driver_event(kind, minute, bus, driver):
+    return SimEvent(kind, minute, bus, driver, None, None, None, None, None, None)
+
+
+class EventSink:
+    """
+    Буферизованный приёмник событий симуляции.
+
+    События копятся в буфере в исходном виде, а форматируются и пишутся
+    пачкой при заполнении буфера и при закрытии.
+    """
+
+    def __init__(self, start_time, buffer_size=1000):
+        self.start_time = start_time
+        self.buffer_size = buffer_size
+        self.buffer = []
+
+    def write(self, event):
+        self.buffer.append(event)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self._write_batch(self.buffer)
+            self.buffer = []
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def to_datetime(self, minute):
+        return self.start_time + timedelta(minutes=minute)
+
+    def _write_batch(self, events):
+        raise NotImplementedError
+
+
+class ConsoleSink(EventSink):
+    """Человекочитаемый вывод в консоль в прежнем формате."""
+
+    def __init__(self, start_time, buffer_size=1000, stream=None):
+        super().__init__(start_time, buffer_size)
+        self.stream = stream or sys.stdout
+
+    def _write_batch(self, events):
+        self.stream.write("".join(self.format(event) for event in events))
+
+    def format(self, event):
+        current_time = self.to_datetime(event.minute)
+        if event.kind == ARRIVAL:
+            return (f"{current_time.strftime('%Y-%m-%d')}, {WEEKDAY_NAMES[current_time.weekday()]}, "
+                    f"[{current_time.strftime('%H:%M')}] Автобус {event.bus} под управлением {event.driver} "
+                    f"прибывает на '{event.stop}' (Ожидающих: {event.waiting})\n"
+                    f"Высажено {event.dropped_off} пассажиров. Подобрано {event.picked_up} пассажиров. "
+                    f"Текущая загрузка: {event.load}/{event.capacity}\n\n")
+        if event.kind == LUNCH_START:
+            return f"Водитель {event.driver} отправился на обеденный перерыв на конечной станции.\n\n"
+        if event.kind == BREAK_START:
+            return f"Водитель {event.driver} отправился на 15-ти минутный перерыв на конечной станции.\n\n"
+        if event.kind == LUNCH_END:
+            return f"Водитель {event.driver} завершил обеденный перерыв.\n\n"
+        if event.kind == BREAK_END:
+            return f"Водитель {event.driver} завершил 15-ти минутный перерыв.\n\n"
+        return f"Водитель {event.driver} завершил смену в {current_time.strftime('%H:%M')}.\n\n"
+
+    def flush(self):
+        super().flush()
+        self.stream.flush()
+
+
+class FileSink(EventSink):
+    """Запись событий в файл JSONL или CSV."""
+
+    def __init__(self, path, start_time, file_format="jsonl", buffer_size=10000):
+        super().__init__(start_time, buffer_size)
+        if file_format not in ("jsonl", "csv"):
+            raise ValueError(f"Неизвестный формат журнала: {file_format}")
+        self.file_format = file_format
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        if file_format == "csv":
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(("time",) + SimEvent._fields)
+
+    def _write_batch(self, events):
+        if self.file_format == "csv":
+            self.writer.writerows((self.to_datetime(event.minute).isoformat(),) + event for event in events)
+        else:
+            self.file.write("".join(
+                json.dumps(dict(event._asdict(), time=self.to_datetime(event.minute).isoformat()),
+                           ensure_ascii=False) + "\n"
+                for event in events))
+
+    def close(self):
+        super().close()
+        self.file.close()
+
+
+class BufferSink:
+    """Копит события в списке events, пока их не заберут (см. EventSimulation.stream)."""
+
+    def __init__(self):
+        self.events = []
+
+    def write(self, event):
+        self.events.append(event)
+
+    def close(self):
+        pass
+
+
+def make_sink(mode, start_time, path=None):
+    """
+    Создаёт приёмник событий: "off" - без журнала (None), "console" - вывод
+    на экран, "jsonl" или "csv" - буферизованная запись в файл path.
+    """
+    if mode == "off":
+        return None
+    if mode == "console":
+        return ConsoleSink(start_time)
+    if path is None:
+        raise ValueError(f"Для журнала {mode} нужен путь к файлу")
+    return FileSink(path, start_time, mode)
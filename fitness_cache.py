@@ -0,0 +1,86 @@
+from collections import OrderedDict
+
+
+class FitnessCache:
+    """
+    Ограниченный LRU-кэш значений функции приспособленности.
+
+    Если average=True, при повторных запросах одного и того же расписания
+    симуляция запускается снова, пока не наберётся max_samples прогонов,
+    и возвращается среднее по всем прогонам.
+    """
+
+    def __init__(self, max_size=10000, average=False, max_samples=5):
+        self.max_size = max_size
+        self.average = average
+        self.max_samples = max_samples
+        self.entries = OrderedDict()  # ключ -> [сумма, число прогонов]
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, evaluate):
+        """Возвращает значение для key, вызывая evaluate() при необходимости."""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            entry = [evaluate(), 1]
+            self.entries[key] = entry
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)  # Удаляем самый давно использованный
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            if self.average and entry[1] < self.max_samples:
+                entry[0] += evaluate()
+                entry[1] += 1
+        return entry[0] / entry[1] if self.average else entry[0]
+
+    def needs_sample(self, key):
+        """Нужна ли для key ещё одна симуляция (учитывается как промах/попадание)."""
+        entry = self.entries.get(key)
+        if entry is None or (self.average and entry[1] < self.max_samples):
+            self.misses += 1
+            return True
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return False
+
+    def put(self, key, value):
+        """Добавляет результат симуляции, посчитанный вне кэша."""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.entries[key] = [value, 1]
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(key)
+            entry[0] += value
+            entry[1] += 1
+
+    def value(self, key, default=None):
+        """Текущее значение для key без запуска симуляции."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return default
+        return entry[0] / entry[1] if self.average else entry[0]
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def state(self):
+        """Содержимое кэша для контрольной точки."""
+        return {"entries": self.entries, "hits": self.hits, "misses": self.misses}
+
+    def load_state(self, state):
+        self.entries = OrderedDict(state["entries"])
+        self.hits = state["hits"]
+        self.misses = state["misses"]
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -1,304 +1,405 @@
+import math
 import random
-from datetime import datetime, timedelta
 
-class Bus:
-    def __init__(self, bus_number, capacity):
-        self.bus_number = bus_number
-        self.capacity = capacity
-        self.current_load = 0
+from budget import GENERATIONS, STOP_MESSAGES, Progress
+from checkpoint import load_checkpoint, save_checkpoint
+from core import build_simulation, describe_drivers, drivers_from_genome, simulate_schedule
+from fitness_cache import FitnessCache
+from genome import SLOT_HOURS, Genome, random_slot
+from network import default_network
+from parallel import ParallelEvaluator
+from population import PopulationManager
+from stats import NULL_STATS
+from surrogate import CoverageSurrogate
+from tables import SIMULATION_END, SIMULATION_START
 
-    def pickup_passengers(self, waiting_passengers):
-        passengers_to_pickup = min(waiting_passengers, self.capacity - self.current_load)
-        self.current_load += passengers_to_pickup
-        return passengers_to_pickup
-
-    def drop_off_passengers(self, is_final_stop):
-        if is_final_stop:
-            passengers_to_drop = self.current_load  # Высаживаем всех
-            self.current_load = 0  # Все пассажиры выходят
-        else:
-            if random.random() < 0.6:  # 60% вероятность высадки
-                passengers_to_drop = random.randint(0, self.current_load)
-                self.current_load -= passengers_to_drop
-            else:
-                passengers_to_drop = 0
-        return passengers_to_drop
-
-
-class BusStop:
-    def __init__(self, name):
-        self.name = name
-        self.waiting_passengers = random.randint(0, 66)
-
-    def update_waiting_passengers(self, current_time):
-        # Добавляем пассажиров в зависимости от времени суток
-        if 7 <= current_time.hour < 9 or 17 <= current_time.hour < 19:
-            new_passengers = random.randint(5, 22)
-        elif 9 <= current_time.hour < 17:
-            new_passengers = random.randint(2, 12)
-        else:
-            new_passengers = random.randint(0, 7)
-        self.waiting_passengers += new_passengers
-        self.waiting_passengers = max(0, self.waiting_passengers)
-
-
-class Driver:
-    def __init__(self, name, driver_type, schedule, start_day=None):
-        self.name = name
-        self.driver_type = driver_type
-        self.schedule = schedule
-        self.has_taken_break = False
-        self.is_on_break = False
-        self.break_start_time = None
-        self.day_counter = 0
-        self.start_day = start_day  # День начала работы для водителей второго типа
-        self.shift_ended = False  # Новый флаг для отслеживания завершения смены
-
-    def is_working(self, current_time):
-        weekday = current_time.weekday()
-        if weekday >= len(self.schedule) or self.schedule[weekday] is None:
-            return False
-        start_time, end_time = self.schedule[weekday]
-        return start_time <= current_time.time() <= end_time
-
-    def can_drive(self, current_time):
-        # Для водителей второго типа проверяем цикл через 3 дня
-        if self.driver_type == 2:
-            if self.start_day is not None:
-                days_since_start = (current_time.date() - self.start_day).days
-                if days_since_start < 0 or (days_since_start % 3) != 0:
-                    return False
-        return self.is_working(current_time) and not self.is_on_break
-
-    def start_break(self, current_time):
-        self.is_on_break = True
-        self.break_start_time = current_time
-
-    def end_break(self, current_time):
-        if self.is_on_break:
-            break_duration = 60 if self.driver_type == 1 else 15
-            if current_time >= self.break_start_time + timedelta(minutes=break_duration):
-                self.is_on_break = False
-                self.break_start_time = None
-
-    def check_end_of_shift(self, current_time):
-        weekday = current_time.weekday()
-        if weekday >= len(self.schedule) or self.schedule[weekday] is None:
-            return
-
-        _, end_time = self.schedule[weekday]
-        if current_time.time() >= end_time and self.is_working(current_time) and not self.shift_ended:
-            self.shift_ended = True  # Устанавливаем флаг завершения смены
-            print(f"Водитель {self.name} завершил смену в {current_time.strftime('%H:%M')}.\n")
-        elif current_time.time() < end_time:
-            self.shift_ended = False  # Смена еще не завершена, сбрасываем флаг
-
-
-class BusSchedule:
-    def __init__(self):
-        self.schedule = {}
-
-    def add_entry(self, stop_name, bus_number, driver_name, arrival_time, waiting_passengers, picked_up, dropped_off):
-        date_key = arrival_time.date()  # Получаем дату прибытия
-        if date_key not in self.schedule:
-            self.schedule[date_key] = {}  # Создаем новый словарь для даты
-        if stop_name not in self.schedule[date_key]:
-            self.schedule[date_key][stop_name] = []
-        self.schedule[date_key][stop_name].append({
-            "bus_number": bus_number,
-            "driver_name": driver_name,
-            "arrival_time": arrival_time.strftime('%H:%M'),
-            "waiting_passengers": waiting_passengers,
-            "picked_up": picked_up,
-            "dropped_off": dropped_off
-        })
-
-    def print_schedule(self):
-        print("\n--- Расписание автобусов по остановкам ---")
-        for date_key, stops in self.schedule.items():
-            weekday_name = get_weekday_name(date_key)
-            print(f"\nДата: {date_key}, {weekday_name}")
-            for stop_name, entries in stops.items():
-                print(f"Остановка: {stop_name}:")
-                for entry in entries:
-                    print(f"  Время: {entry['arrival_time']} - Автобус: {entry['bus_number']}.")
-
-
-
-def travel_time(current_time):
-    if 7 <= current_time.hour < 9 or 17 <= current_time.hour < 19:  # Пиковые часы
-        return random.randint(10, 11)  # Утро
-    elif 9 <= current_time.hour < 17:  # Дневные часы
-        return random.randint(11, 12)  # Днем
-    else:
-        return random.randint(12, 13)  # Ночью
-
-
-def get_weekday_name(date):
-    weekdays = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
-    return weekdays[date.weekday()]
-
-def generate_random_time(hour_start, hour_end):
-    """
-    Генерирует случайное время в заданном диапазоне часов с минутами из 00, 15, 30, 45.
-    """
-    hour = random.randint(hour_start, hour_end)
-    minute = random.choice([0, 15, 30, 45])
-    return datetime.strptime(f"{hour}:{minute:02}", "%H:%M").time()
 
 class GeneticAlgorithm:
-    def __init__(self, population_size, generations, mutation_rate):
+    def __init__(self, population_size, generations, mutation_rate,
+                 cache_size=10000, average_fitness=False, max_samples=5,
+                 workers=1, chunksize=None, seed=None, batch=False,
+                 simulation_end_time=SIMULATION_END, stats=None,
+                 surrogate_fraction=None, racing=None, deduplicate=False, network=None,
+                 start_state=None, fixed_genes=None, snapshots=None):
         self.population_size = population_size
         self.generations = generations
         self.mutation_rate = mutation_rate
+        self.simulation_end_time = simulation_end_time  # Конец симуляции при оценке
+        # Сеть маршрутов (network.Network): в геноме по водителю на каждый автобус сети
+        self.network = network or default_network()
+        # Перепланирование (см. replan.py): оценка с момента start_state.now,
+        # гены fixed_genes {номер водителя: ген} не меняются
+        self.start_state = start_state
+        self.fixed_genes = dict(fixed_genes or {})
+        start_time = start_state.now if start_state is not None else SIMULATION_START
+        # Счётчики и таймеры фаз (stats.SimStats); по умолчанию выключены
+        self.stats = stats if stats is not None else NULL_STATS
+        # Предварительный отбор потомков дешёвой оценкой: из каждых 1 / surrogate_fraction
+        # кандидатов в популяцию (и на полную симуляцию) попадает один
+        self.surrogate_fraction = surrogate_fraction
+        self.surrogate = None
+        if surrogate_fraction is not None and surrogate_fraction < 1:
+            self.surrogate = CoverageSurrogate(start_time, simulation_end_time)
+        # Кэш приспособленности: элита и повторные вызовы не пересимулируются
+        self.cache = FitnessCache(cache_size, average_fitness, max_samples)
+        self.evaluations = 0  # Число сделанных симуляций (для бюджета оценок)
+        self.population = None  # Текущая популяция, доступна после каждого поколения
+        # Канонизация, починка и отсев повторов до оценки (population.PopulationManager)
+        self.population_manager = None
+        if deduplicate:
+            # С середины симуляции водители не взаимозаменяемы: автобусы уже в разных местах
+            segments = self.network.driver_slices()
+            if start_state is not None:
+                segments = [(i, i + 1) for i in range(self.network.num_buses)]
+            self.population_manager = PopulationManager(start_time, simulation_end_time, segments=segments,
+                                                        fixed=self.fixed_genes)
+        # Шумная приспособленность: повторы на общих случайных числах с гонкой (racing.Racing)
+        self.racing = racing
+        if racing is not None and batch:
+            raise ValueError("Гонка повторов не поддерживается пакетной оценкой")
+        if start_state is not None and batch:
+            raise ValueError("Продолжение с середины симуляции не поддерживается пакетной оценкой")
+        # Оценка с общего начала по снимкам на границах суток (snapshots.PrefixSnapshots);
+        # приспособленность тогда считается на общих случайных числах snapshots.seed
+        self.snapshots = snapshots
+        if snapshots is not None and (batch or workers != 1):
+            raise ValueError("Снимки состояния поддерживаются только при оценке в одном процессе")
+        # При batch=True популяция оценивается пакетно на NumPy,
+        # при workers != 1 - в пуле процессов
+        if batch:
+            from batch import BatchEvaluator
+            self.evaluator = BatchEvaluator(seed, simulation_end_time, network)
+        elif workers != 1:
+            self.evaluator = ParallelEvaluator(workers, chunksize, seed, simulation_end_time, network, start_state)
+        else:
+            self.evaluator = None
 
-    def initialize_population(self):
-        """Создаёт начальную популяцию расписаний."""
+    def initialize_population(self, seeds=()):
+        """
+        Создаёт начальную популяцию расписаний. Особи seeds (например,
+        популяция прошлого запуска) берутся первыми, остальные - случайные.
+        """
         population = []
-        for _ in range(self.population_size):
-            schedule = self.generate_random_schedule()
-            population.append(schedule)
+        admission = self._admission()
+        for schedule in seeds:
+            if len(population) == self.population_size:
+                break
+            schedule = admission(self.constrain(schedule))
+            if schedule is not None:
+                population.append(schedule)
+        while len(population) < self.population_size:
+            schedule = admission(self.constrain(self.generate_random_schedule()))
+            if schedule is not None:
+                population.append(schedule)
         return population
 
-    def generate_random_schedule(self):
-        """Создаёт случайное расписание для водителей."""
-        drivers = []
-        num_drivers_type1 = random.randint(0, 7)
-        num_drivers_type2 = 8 - num_drivers_type1
-
-        # Генерация расписаний для водителей 1 типа
-        for i in range(num_drivers_type1):
-            start_time = generate_random_time(7, 12)
-            end_time = (datetime.combine(datetime.today(), start_time) + timedelta(hours=9)).time()
-            schedule = [(start_time, end_time)] * 5 + [None, None]
-            drivers.append(Driver(f"Кентик {i + 1}", 1, schedule))
-
-        # Генерация расписаний для водителей 2 типа
-        for i in range(num_drivers_type2):
-            start_time = generate_random_time(0, 11)
-            end_time = (datetime.combine(datetime.today(), start_time) + timedelta(hours=12)).time()
-            schedule = [(start_time, end_time)] * 7
-            start_day = datetime(2024, 12, random.randint(16, 23)).date()
-            drivers.append(Driver(f"Кентик {num_drivers_type1 + i + 1}", 2, schedule, start_day))
+    def _admission(self, taken=()):
+        """
+        Фильтр новых особей: без менеджера популяции пропускает всё, иначе
+        возвращает канонический геном или None для повтора, пока число попыток
+        не превысит лимит.
+        """
+        manager = self.population_manager
+        if manager is None:
+            return lambda schedule: schedule
+        taken = set(taken)
+        limit = manager.attempts_per_candidate * self.population_size
+        attempts = 0
+
+        def admit(schedule):
+            nonlocal attempts
+            attempts += 1
+            return manager.admit(schedule, taken, force=attempts > limit)
+        return admit
+
+    def constrain(self, schedule):
+        """Возвращает расписание с закреплёнными генами fixed_genes."""
+        if not self.fixed_genes or all(schedule[i] == gene for i, gene in self.fixed_genes.items()):
+            return schedule
+        genes = list(schedule)
+        for i, gene in self.fixed_genes.items():
+            genes[i] = gene
+        return Genome.from_genes(genes)
 
-        return drivers
+    def generate_random_schedule(self):
+        """Создаёт случайное расписание для водителей (пул каждого маршрута отдельно)."""
+        genes = []
+        for route in self.network.routes:
+            if not route.buses:
+                continue
+            num_drivers_type1 = random.randint(0, route.buses - 1)
+            num_drivers_type2 = route.buses - num_drivers_type1
+
+            # Водители 1 типа начинают смену с 7 до 12 часов, 2 типа - с 0 до 11
+            genes += [(1, random_slot(*SLOT_HOURS[1]), 0) for _ in range(num_drivers_type1)]
+            genes += [(2, random_slot(*SLOT_HOURS[2]), random.randint(1, 8)) for _ in range(num_drivers_type2)]
+        return Genome.from_genes(genes)
 
     def fitness(self, schedule):
-        """Вычисляет общее количество перевезённых пассажиров для данного расписания."""
-        total_passengers_transported = 0
-
-        def simulate_with_schedule(schedule):
-            nonlocal total_passengers_transported
-            bus_stops = [BusStop(f"Stop {chr(65 + i)}") for i in range(8)]  # Создаём остановки
-            buses = [Bus(f"{100 + i}", 26) for i in range(len(schedule))]   # Создаём автобусы
-            current_time = datetime(2024, 12, 16, 7, 0)                     # Начало симуляции
-            simulation_end_time = datetime(2024, 12, 23, 23, 59)            # Конец симуляции
-            bus_positions = [0] * len(buses)                                # Позиции автобусов
-            bus_schedule = [current_time] * len(buses)                      # Время прибытия
-
-            while current_time < simulation_end_time:
-                for i, bus in enumerate(buses):
-                    driver = schedule[i]
-                    if not driver.can_drive(current_time):
-                        if driver.is_on_break:
-                            driver.end_break(current_time)
-                        continue
-
-                    if current_time >= bus_schedule[i]:
-                        current_stop_index = bus_positions[i]
-                        is_final_stop = (current_stop_index == len(bus_stops) - 1)
-                        stop = bus_stops[current_stop_index]
-
-                        # Обновляем пассажиров на остановке
-                        stop.update_waiting_passengers(current_time)
-
-                        # Высадка и посадка пассажиров
-                        dropped_off = bus.drop_off_passengers(is_final_stop)
-                        picked_up = bus.pickup_passengers(stop.waiting_passengers)
-                        stop.waiting_passengers -= picked_up
-
-                        # Обновляем общее число перевезённых пассажиров
-                        total_passengers_transported += dropped_off
-
-                        # Проверяем начало перерыва
-                        if is_final_stop and driver.driver_type == 1 and not driver.has_taken_break and not driver.is_on_break:
-                          if datetime.strptime("13:00", "%H:%M").time() <= current_time.time() < datetime.strptime("15:00", "%H:%M").time():
-                            driver.start_break(current_time)  # Начинаем обеденный перерыв
-                            driver.has_taken_break = True  # Устанавливаем флаг об обеде
-                            bus_schedule[i] += timedelta(minutes=60)  # Учитываем часовой перерыв
-
-                        if is_final_stop and driver.driver_type == 2 and not driver.is_on_break:
-                          driver.start_break(current_time)  # Начинаем 15-ти минутный перерыв
-                          bus_schedule[i] += timedelta(minutes=15)  # Учитываем 15-минутный перерыв
-
-                        # Переходим к следующей остановке
-                        bus_positions[i] = (bus_positions[i] + 1) % len(bus_stops)
-
-                        # Рассчитываем время прибытия на следующую остановку
-                        bus_schedule[i] += timedelta(minutes=travel_time(current_time))
-
-                # Переход на минуту вперёд
-                current_time += timedelta(minutes=1)
-
-        simulate_with_schedule(schedule)
-        return total_passengers_transported
-
+        """Приспособленность расписания с учётом кэша."""
+        return self.cache.get(schedule, lambda: self.simulate(schedule))
+
+    def simulate(self, schedule):
+        """Прогоняет симуляцию без кэша на новых объектах водителей."""
+        self.evaluations += 1
+        if self.snapshots is not None:
+            return self.simulate_from_snapshot(schedule, self.snapshots.seed)
+        return simulate_schedule(drivers_from_genome(schedule), self.simulation_end_time, self.stats,
+                                 network=self.network, state=self.start_state)
+
+    def simulate_from_snapshot(self, schedule, seed):
+        """Симуляция на общих случайных числах seed с последнего подходящего снимка."""
+        simulation = build_simulation(drivers_from_genome(schedule), self.simulation_end_time, self.stats, seed,
+                                      self.network, state=self.start_state)
+        return self.snapshots.run(schedule, simulation, seed)
+
+    def evaluate_population(self, population, keep=None):
+        """
+        Приспособленность каждой особи; новые расписания считаются параллельно или пакетно.
+
+        С гонкой повторов keep - число отбираемых особей (по умолчанию половина популяции).
+        """
+        if self.racing is not None:
+            keep = keep if keep is not None else self.population_size // 2
+            return self.racing.race(population, keep, self.simulate_replications)
+        if self.evaluator is None:
+            return [self.fitness(schedule) for schedule in population]
+
+        pending = {}  # Уникальные расписания, которые нужно просимулировать
+        for schedule in population:
+            if schedule not in pending and self.cache.needs_sample(schedule):
+                pending[schedule] = None
+        fresh = dict(zip(pending, self.evaluator.map(list(pending))))
+        self.evaluations += len(pending)
+        for schedule, value in fresh.items():
+            self.cache.put(schedule, value)
+        return [self.cache.value(schedule, fresh.get(schedule)) for schedule in population]
+
+    def simulate_replications(self, tasks):
+        """Симулирует пары (геном, номер повтора) на общих случайных числах."""
+        self.evaluations += len(tasks)
+        self.stats.count("replications", len(tasks))
+        seeds = [self.racing.seed_for(replication) for _, replication in tasks]
+        if self.evaluator is not None:
+            return self.evaluator.map([genome for genome, _ in tasks], crn_seeds=seeds)
+        if self.snapshots is not None:
+            return [self.simulate_from_snapshot(genome, seed) for (genome, _), seed in zip(tasks, seeds)]
+        return [simulate_schedule(drivers_from_genome(genome), self.simulation_end_time, self.stats, seed,
+                                  self.network, state=self.start_state) for (genome, _), seed in zip(tasks, seeds)]
 
     def crossover(self, parent1, parent2):
-        """Кроссовер двух расписаний."""
+        """Кроссовер двух расписаний (при одном водителе - без изменений)."""
+        if len(parent1) < 2:
+            return parent1, parent2
         crossover_point = random.randint(1, len(parent1) - 1)
-        child1 = parent1[:crossover_point] + parent2[crossover_point:]
-        child2 = parent2[:crossover_point] + parent1[crossover_point:]
+        child1 = parent1.splice(parent2, crossover_point)
+        child2 = parent2.splice(parent1, crossover_point)
         return child1, child2
 
     def mutate(self, schedule):
-        """Мутация расписания."""
+        """Мутация расписания: возвращает новый геном, исходный не меняется."""
         if random.random() < self.mutation_rate:
-            driver_to_mutate = random.choice(schedule)
-            if driver_to_mutate.driver_type == 1:
-                start_time = generate_random_time(7, 12)
-                end_time = (datetime.combine(datetime.today(), start_time) + timedelta(hours=9)).time()
-                driver_to_mutate.schedule = [(start_time, end_time)] * 5 + [None, None]
-            else:
-                start_time = generate_random_time(0, 11)
-                end_time = (datetime.combine(datetime.today(), start_time) + timedelta(hours=12)).time()
-                driver_to_mutate.schedule = [(start_time, end_time)] * 7
+            i = random.randrange(len(schedule))
+            driver_type = schedule[i][0]
+            slot = random_slot(*SLOT_HOURS[driver_type])
+            return schedule.replace(i, slot=slot)
         return schedule
 
-    def evolve(self):
-        """Основной цикл ГА."""
-        population = self.initialize_population()
-        for generation in range(self.generations):
-            population = sorted(population, key=self.fitness, reverse=True)
-            best_fitness = self.fitness(population[0])
-            print(f"Поколение {generation + 1}: перевезено пассажиров - {best_fitness}")
-            new_population = population[:self.population_size // 2]
-            while len(new_population) < self.population_size:
-                parent1, parent2 = random.sample(population[:self.population_size // 2], 2)
+    def evolve(self, checkpoint_path=None, checkpoint_every=1, budget=None, callback=None, population=None):
+        """
+        Основной цикл ГА.
+
+        Если задан checkpoint_path, каждые checkpoint_every поколений туда
+        сохраняется состояние, из которого resume() продолжает работу.
+        budget (budget.Budget) ограничивает время, число оценок и застой;
+        callback(progress) вызывается после каждого поколения и может
+        прервать работу, вернув False. population - особи для начальной
+        популяции (см. initialize_population). Возвращает лучшее расписание.
+        """
+        return self._evolve(self.evolve_iter(budget, checkpoint_path, checkpoint_every, population), callback)
+
+    def evolve_iter(self, budget=None, checkpoint_path=None, checkpoint_every=1, population=None):
+        """
+        Anytime-вариант evolve(): генератор, выдающий budget.Progress после
+        каждого поколения. Лучшее на данный момент расписание - progress.best;
+        прервать перебор можно в любой момент.
+        """
+        self.best = None  # Лучшая особь за всё время: (приспособленность, геном)
+        return self._generations(self.initialize_population(population or ()), 0, checkpoint_path,
+                                 checkpoint_every, budget)
+
+    def resume(self, checkpoint_path, checkpoint_every=1, budget=None, callback=None):
+        """
+        Продолжает evolve() с последней контрольной точки так же, как без
+        прерывания. Число сделанных оценок и счётчик застоя бюджета берутся из
+        контрольной точки, а бюджет времени отсчитывается заново с момента
+        продолжения.
+        """
+        state = load_checkpoint(checkpoint_path)
+        if (state["population_size"], state["mutation_rate"]) != (self.population_size, self.mutation_rate):
+            raise ValueError("Параметры ГА не совпадают с контрольной точкой")
+        random.setstate(state["random_state"])
+        self.cache.load_state(state["cache"])
+        if self.evaluator is not None:
+            self.evaluator.load_state(state["evaluator"])
+        if self.surrogate is not None:
+            self.surrogate.load_state(state["surrogate"])
+        if self.racing is not None:
+            self.racing.load_state(state["racing"])
+        if self.population_manager is not None:
+            self.population_manager.load_state(state["population_manager"])
+        if self.snapshots is not None:
+            self.snapshots.load_state(state["snapshots"])
+        self.best = state["best"]
+        self.evaluations = state["evaluations"]
+        generations = self._generations(state["population"], state["generation"], checkpoint_path,
+                                        checkpoint_every, budget, state["budget"])
+        return self._evolve(generations, callback)
+
+    def save_checkpoint(self, checkpoint_path, population, generation, budget=None):
+        save_checkpoint(checkpoint_path, {
+            "population_size": self.population_size,
+            "mutation_rate": self.mutation_rate,
+            "generation": generation,
+            "population": population,
+            "best": self.best,
+            "evaluations": self.evaluations,
+            "budget": budget.state() if budget is not None else None,
+            "random_state": random.getstate(),
+            "cache": self.cache.state(),
+            "evaluator": self.evaluator.state() if self.evaluator is not None else None,
+            "surrogate": self.surrogate.state() if self.surrogate is not None else None,
+            "racing": self.racing.state() if self.racing is not None else None,
+            "population_manager": self.population_manager.state() if self.population_manager is not None else None,
+            "snapshots": self.snapshots.state() if self.snapshots is not None else None,
+        })
+
+    def make_offspring(self, parents, count):
+        """Потомки родителей; при включённой дешёвой оценке - лучшие из расширенного набора."""
+        stats = self.stats
+        candidates_count = count
+        if self.surrogate is not None:
+            candidates_count = math.ceil(count / self.surrogate_fraction)
+        offspring = []
+        admission = self._admission(parents)
+        while len(offspring) < candidates_count:
+            parent1, parent2 = random.sample(parents, 2)
+            with stats.timer("crossover"):
                 child1, child2 = self.crossover(parent1, parent2)
-                new_population.extend([self.mutate(child1), self.mutate(child2)])
-            population = new_population
-        return max(population, key=self.fitness)
+            with stats.timer("mutation"):
+                children = [admission(self.constrain(self.mutate(child1))),
+                            admission(self.constrain(self.mutate(child2)))]
+            offspring.extend(child for child in children if child is not None)
+        if self.surrogate is None:
+            return offspring
+        with stats.timer("surrogate"):
+            return self.surrogate.select(offspring, count)
+
+    def rank_population(self, population):
+        """Оценивает и сортирует популяцию по убыванию приспособленности."""
+        stats = self.stats
+        with stats.timer("evaluation"):
+            scores = self.evaluate_population(population)
+        with stats.timer("sorting"):
+            order = sorted(range(len(population)), key=scores.__getitem__, reverse=True)
+            population = [population[i] for i in order]
+            scores = [scores[i] for i in order]
+        if self.population_manager is not None:
+            self.population_manager.mark_seen(population)
+        if self.best is None or scores[0] > self.best[0]:
+            self.best = (scores[0], population[0])
+        if self.surrogate is not None:
+            with stats.timer("surrogate"):
+                stats.gauge("surrogate_correlation", self.surrogate.observe(population, scores))
+        return population, scores
+
+    def next_population(self, ranked):
+        """Следующее поколение: лучшая половина и её потомки."""
+        elite = ranked[:self.population_size // 2]
+        return elite + self.make_offspring(elite, self.population_size - len(elite))
+
+    def evolve_islands(self, islands=4, migration_interval=5, migrants=2, seed=None):
+        """Островная модель: см. islands.run_islands."""
+        from islands import run_islands
+        return run_islands(self, islands, migration_interval, migrants, seed)
+
+    def _evolve(self, generations, callback):
+        try:
+            for progress in generations:
+                if callback is not None and callback(progress) is False:
+                    break
+        finally:
+            generations.close()
+        return self.result
+
+    def _generations(self, population, first_generation, checkpoint_path, checkpoint_every, budget,
+                     budget_state=None):
+        stats = self.stats
+        if budget is not None:
+            budget.start(self.evaluations)
+            if budget_state is not None:
+                budget.load_state(budget_state)
+        self.stop_reason = None  # None - перебор прерван снаружи
+        self.population = population
+        try:
+            for generation in range(first_generation, self.generations):
+                with stats.timer("generation"):
+                    population, scores = self.rank_population(population)
+                    best_fitness = scores[0]
+                    print(f"Поколение {generation + 1}: перевезено пассажиров - {best_fitness} "
+                          f"(кэш: {self.cache.hits} попаданий, {self.cache.misses} промахов)")
+                    if self.surrogate is not None:
+                        print(f"  Ранговая корреляция дешёвой оценки с симуляцией: "
+                              f"{self.surrogate.correlations[-1]:.2f}")
+                    if self.racing is not None:
+                        print(f"  Симуляций с начала гонки: {self.racing.replications}")
+                    if self.population_manager is not None:
+                        manager = self.population_manager
+                        diversity = manager.diversity(population)
+                        stats.gauge("diversity", diversity)
+                        print(f"  Разнообразие популяции: {diversity:.2f} (отброшено повторов: "
+                              f"{manager.duplicates}, починено генов: {manager.repaired})")
+                    if self.snapshots is not None:
+                        snapshots = self.snapshots
+                        stats.gauge("snapshot_skipped_share", snapshots.skipped_share())
+                        print(f"  Снимки состояния: продолжено {snapshots.hits} из "
+                              f"{snapshots.hits + snapshots.misses} симуляций, "
+                              f"пропущено {snapshots.skipped_share():.0%} минут")
+                    population = self.next_population(population)
+                    self.population = population
+                    self.result = self.best[1]
+                last_generation = generation + 1 == self.generations
+                # Бюджет проверяется до сохранения, чтобы его состояние попало в контрольную точку
+                reason = None
+                if budget is not None and not last_generation:
+                    reason = budget.exhausted(self.best[0], self.evaluations)
+                saved = checkpoint_path and ((generation + 1) % checkpoint_every == 0 or last_generation
+                                             or reason is not None)
+                if saved:
+                    with stats.timer("checkpoint"):
+                        self.save_checkpoint(checkpoint_path, population, generation + 1, budget)
+                stats.count("generations")
+                stats.gauge("best_fitness", best_fitness)
+                stats.gauge("cache_hit_rate", self.cache.hit_rate())
+                stats.maybe_dump()
+                elapsed = budget.elapsed() if budget is not None else None
+                yield Progress(generation + 1, self.best[0], self.best[1], self.evaluations, elapsed)
+                if reason is not None:
+                    self.stop_reason = reason
+                    print(f"Остановка после поколения {generation + 1}: {STOP_MESSAGES[reason]}")
+                    return
+            with stats.timer("evaluation"):
+                scores = self.evaluate_population(population, keep=1)
+            self.result = population[scores.index(max(scores))]
+            self.stop_reason = GENERATIONS
+        finally:
+            if self.evaluator is not None:
+                self.evaluator.close()
+
 
 if __name__ == "__main__":
-    ga = GeneticAlgorithm(population_size=100, generations=100, mutation_rate=0.1)
-    best_schedule = ga.evolve()
+    ga = GeneticAlgorithm(population_size=100, generations=100, mutation_rate=0.1, workers=None)
+    best_schedule = drivers_from_genome(ga.evolve())
     print("Лучшее расписание найдено:")
-    unique_schedules = set()
-
-for driver in best_schedule:
-  driver_type = "типа 1" if driver.driver_type == 1 else "типа 2"
-  for day_schedule in driver.schedule:
-    if day_schedule is not None:
-      start_time, end_time = day_schedule
-      if driver.driver_type == 2 and driver.start_day is not None:
-        start_weekday = get_weekday_name(driver.start_day)
-        schedule_entry = (
-            f"{driver.name} {driver_type} (начало смены {start_time}, конец смены {end_time}, "
-            f"начальный день {start_weekday} ({driver.start_day}))")
-      else:
-        schedule_entry = f"{driver.name} {driver_type} (начало смены {start_time}, конец смены {end_time})"
-
-      if schedule_entry not in unique_schedules:
-        unique_schedules.add(schedule_entry)
+    for schedule_entry in describe_drivers(best_schedule):
         print(schedule_entry)
@@ -0,0 +1,83 @@
+import random
+from datetime import date, timedelta
+
+START_DATE = date(2024, 12, 16)  # День 1 для start_day
+SLOT_MINUTES = 15                # Смены начинаются в 00, 15, 30 или 45 минут
+SHIFT_HOURS = {1: 9, 2: 12}      # Длительность смены по типу водителя
+WORK_DAYS = {1: 5, 2: 7}         # Рабочие дни недели (с понедельника) по типу водителя
+SLOT_HOURS = {1: (7, 12), 2: (0, 11)}  # Часы, в которые может начинаться смена
+
+
+def random_slot(hour_start, hour_end):
+    """Случайный 15-минутный слот в заданном диапазоне часов (как generate_random_time)."""
+    return random.randint(hour_start, hour_end) * 4 + random.choice([0, 1, 2, 3])
+
+
+def shift_window(driver_type, slot):
+    """Начало и конец смены в минутах суток."""
+    start = slot * SLOT_MINUTES
+    return start, start + SHIFT_HOURS[driver_type] * 60
+
+
+class Genome:
+    """
+    Компактное неизменяемое расписание водителей для ГА.
+
+    На каждого водителя приходится три байта: тип, номер 15-минутного слота
+    начала смены и день начала 3-дневного цикла (0 - не задан, 1 - 16 декабря,
+    2 - 17 декабря и т.д.). Состояние перерывов в геноме не хранится: объекты
+    Driver создаются заново для каждой симуляции. Кроссовер и мутация
+    возвращают новые геномы, а исходные можно безопасно разделять между особями.
+    """
+
+    __slots__ = ('data', '_hash')
+
+    def __init__(self, data):
+        self.data = bytes(data)
+        self._hash = hash(self.data)
+
+    @classmethod
+    def from_genes(cls, genes):
+        """Создаёт геном из последовательности (тип, слот, день)."""
+        return cls(bytes(value for gene in genes for value in gene))
+
+    def __len__(self):
+        return len(self.data) // 3
+
+    def __iter__(self):
+        data = self.data
+        for i in range(0, len(data), 3):
+            yield data[i], data[i + 1], data[i + 2]
+
+    def __getitem__(self, i):
+        return self.data[3 * i], self.data[3 * i + 1], self.data[3 * i + 2]
+
+    def __eq__(self, other):
+        return isinstance(other, Genome) and self.data == other.data
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        # Хеш bytes зависит от процесса, поэтому передаём только данные
+        return Genome, (self.data,)
+
+    def __repr__(self):
+        return f"Genome({list(self)})"
+
+    def start_day(self, i):
+        """Дата начала цикла водителя i или None."""
+        day = self.data[3 * i + 2]
+        return START_DATE + timedelta(days=day - 1) if day else None
+
+    def replace(self, i, driver_type=None, slot=None, day=None):
+        """Новый геном, в котором у водителя i заменены указанные гены."""
+        old_type, old_slot, old_day = self[i]
+        gene = bytes((old_type if driver_type is None else driver_type,
+                      old_slot if slot is None else slot,
+                      old_day if day is None else day))
+        return Genome(self.data[:3 * i] + gene + self.data[3 * i + 3:])
+
+    def splice(self, other, point):
+        """Первые point водителей из self, остальные из other."""
+        return Genome(self.data[:3 * point] + other.data[3 * point:])
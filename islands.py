@@ -0,0 +1,146 @@
+import multiprocessing
+import queue
+import random
+import threading
+
+from genome import Genome
+
+
+def _encode(genomes):
+    """Мигранты передаются как склеенные байты геномов."""
+    return b"".join(genome.data for genome in genomes)
+
+
+def _decode(data, genome_size):
+    return [Genome(data[i:i + genome_size]) for i in range(0, len(data), genome_size)]
+
+
+def _send_loop(outbox, outgoing):
+    """Отправка мигрантов соседу в отдельном потоке: до пустого сообщения включительно."""
+    while True:
+        data = outgoing.get()
+        outbox.send_bytes(data)
+        if not data:
+            return
+
+
+def _island_streams(ga, index):
+    """
+    Свои потоки шума оценок для острова index: иначе копии ga на всех
+    островах оценивают расписания на одних и тех же случайных числах.
+    """
+    for component in (ga.evaluator, ga.snapshots, ga.racing):
+        if getattr(component, "seed", None) is not None:
+            component.seed = f"{component.seed}:{index}"
+    rng = getattr(ga.evaluator, "rng", None)
+    if rng is not None:
+        # batch.BatchEvaluator: непересекающийся отрезок того же генератора NumPy
+        ga.evaluator.rng = type(rng)(rng.bit_generator.jumped(index + 1))
+
+
+def _island(index, ga, seed, migration_interval, migrants, inbox, outbox, results):
+    """
+    Эволюция одного острова в отдельном процессе.
+
+    Каждые migration_interval поколений лучшие migrants особей отправляются
+    соседу по кольцу. Входящие мигранты забираются без ожидания (poll),
+    поэтому острова не синхронизируются между собой.
+
+    Сообщение больше буфера канала (около 64 КБ) блокирует отправителя,
+    пока сосед его не прочитает, поэтому отправка идёт в отдельном потоке -
+    иначе острова кольца могут зависнуть, отправляя друг другу одновременно.
+    Закончив, остров отправляет соседу пустое сообщение и дочитывает свой
+    вход до такого же сообщения от предыдущего острова, чтобы тот не завис
+    на отправке. Результат или исключение кладётся в results.
+    """
+    try:
+        random.seed(f"{seed}:{index}")
+        _island_streams(ga, index)
+        ga.best = None
+        population = ga.initialize_population()
+        genome_size = len(population[0].data)
+        sender_done = False  # Предыдущий остров закончил и больше ничего не пришлёт
+        outgoing = queue.SimpleQueue()
+        sender = threading.Thread(target=_send_loop, args=(outbox, outgoing), daemon=True)
+        sender.start()
+        try:
+            for generation in range(ga.generations):
+                ranked, scores = ga.rank_population(population)
+                print(f"Остров {index + 1}, поколение {generation + 1}: перевезено пассажиров - {scores[0]}")
+                population = ga.next_population(ranked)
+                if (generation + 1) % migration_interval == 0:
+                    outgoing.put(_encode(ranked[:migrants]))
+                incoming = []
+                while inbox.poll():
+                    data = inbox.recv_bytes()
+                    sender_done = sender_done or not data
+                    incoming.extend(_decode(data, genome_size))
+                if incoming:
+                    # Мигранты заменяют часть новых потомков и оцениваются в следующем поколении
+                    incoming = incoming[-(ga.population_size - ga.population_size // 2):]
+                    population[len(population) - len(incoming):] = incoming
+            ga.rank_population(population)
+            outgoing.put(b"")
+            while not sender_done:
+                sender_done = not inbox.recv_bytes()
+            sender.join()
+        finally:
+            if ga.evaluator is not None:
+                ga.evaluator.close()
+        best_fitness, best = ga.best
+        results.put((index, None, (best_fitness, best.data)))
+    except Exception as error:
+        results.put((index, error, None))
+
+
+def run_islands(ga, islands=4, migration_interval=5, migrants=2, seed=None):
+    """
+    Островная модель ГА: islands подпопуляций, по одной на процесс.
+
+    Каждый остров - копия ga (размер популяции, число поколений, операторы)
+    со своим потоком случайных чисел. Лучшие особи мигрируют по кольцу через
+    каналы multiprocessing.Pipe в виде байтов геномов. Возвращает лучший
+    геном среди всех островов, а его приспособленность кладёт в ga.best.
+    """
+    seed = seed if seed is not None else random.getrandbits(64)
+    context = multiprocessing.get_context()
+    pipes = [context.Pipe(duplex=False) for _ in range(islands)]  # (приём, отправка)
+    results = context.Queue()
+    processes = []
+    for index in range(islands):
+        inbox = pipes[index][0]
+        outbox = pipes[(index + 1) % islands][1]  # Соседу по кольцу
+        process = context.Process(target=_island, args=(index, ga, seed, migration_interval, migrants,
+                                                        inbox, outbox, results))
+        process.start()
+        processes.append(process)
+    for receiver, sender in pipes:
+        receiver.close()  # Концы каналов нужны только островам
+        sender.close()
+
+    best = {}
+    try:
+        dead_polls = 0
+        while len(best) < islands:
+            try:
+                index, error, result = results.get(timeout=1)
+            except queue.Empty:
+                # Процесс мог завершиться, так и не отправив результат (например, убит системой)
+                dead = [process for index, process in enumerate(processes)
+                        if index not in best and not process.is_alive()]
+                dead_polls = dead_polls + 1 if dead else 0
+                if dead_polls > 1:
+                    raise RuntimeError(f"Процесс острова завершился без результата (код {dead[0].exitcode})")
+                continue
+            if error is not None:
+                raise error
+            fitness, data = result
+            best[index] = (fitness, index, Genome(data))
+    finally:
+        for process in processes:
+            if len(best) < islands:
+                process.terminate()  # После ошибки на одном острове остальные не нужны
+            process.join()
+    fitness, _, genome = max(best.values(), key=lambda item: (item[0], -item[1]))
+    ga.best = (fitness, genome)
+    return genome
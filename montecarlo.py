@@ -0,0 +1,151 @@
+"""
+Прогон simulate_buses по сетке сценариев методом Монте-Карло.
+
+Каждый повтор - отдельная симуляция в пуле процессов со своим seed,
+зависящим только от общего seed, имени сценария и номера повтора, поэтому
+результат не зависит от числа процессов. Журнал прибытий не создаётся:
+каждый повтор сворачивается в summary.SimulationSummary, а наружу
+возвращаются только агрегаты:
+
+    python montecarlo.py --replications 200 --horizons 7 28 --output mc.json
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from statistics import fmean, pstdev
+
+from tables import DEMAND_RANGES, horizon_end
+
+# Спрос по интервалам суток (ночь, день, пик)
+DEMAND_PROFILES = {
+    "обычный": DEMAND_RANGES,
+    "праздничный пик": (DEMAND_RANGES[0], DEMAND_RANGES[1], (10, 40)),
+}
+
+Scenario = namedtuple("Scenario", "name end_time demand_ranges")
+
+PERCENTILES = (5, 50, 95)
+
+
+def scenario_grid(horizons=(7,), demand_profiles=None):
+    """Сценарии - все сочетания длительности (дни) и профиля спроса."""
+    demand_profiles = demand_profiles or DEMAND_PROFILES
+    return [Scenario(f"{days} дн., {profile}", horizon_end(days),
+                     tuple(map(tuple, demand)))
+            for days, (profile, demand) in itertools.product(horizons, demand_profiles.items())]
+
+
+_roster = None   # Состав водителей и сеть рабочего процесса (передаются один раз при запуске)
+_network = None
+
+
+def _init_worker(roster, network):
+    global _roster, _network
+    _roster, _network = roster, network
+
+
+def _replicate(task):
+    """Один повтор: свёртка потока событий без журнала."""
+    from hands import stream_buses
+    from network import default_network
+    from summary import SimulationSummary
+
+    scenario, seed = task
+    network = _network or default_network()
+    random.seed(seed)
+    summary = SimulationSummary(network.stop_names)
+    for item in stream_buses(scenario.end_time, network=network, roster=_roster,
+                             demand_ranges=scenario.demand_ranges):
+        summary.add(item)
+    return summary.transported, summary.average_load, summary.waiting
+
+
+def percentile(values, q):
+    """Процентиль q (0-100) с линейной интерполяцией по отсортированным values."""
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def describe(values):
+    values = sorted(values)
+    result = {"mean": fmean(values), "std": pstdev(values)}
+    result.update((f"p{q}", percentile(values, q)) for q in PERCENTILES)
+    return result
+
+
+def run_scenarios(scenarios, replications=100, roster=None, network=None, seed=0, workers=None, chunksize=None):
+    """
+    Прогоняет replications повторов каждого сценария и возвращает агрегаты:
+    среднее, стандартное отклонение и процентили перевезённых пассажиров,
+    средней загрузки и недовольных пассажиров (всего и по остановкам).
+    roster - состав водителей как в hands.default_roster (по умолчанию он).
+    """
+    from network import default_network
+
+    network = network or default_network()
+    tasks = [(scenario, f"{seed}:{scenario.name}:{r}") for scenario in scenarios for r in range(replications)]
+    workers = workers or os.cpu_count() or 1
+    chunksize = chunksize or max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(roster, network)) as pool:
+        outcomes = list(pool.map(_replicate, tasks, chunksize=chunksize))
+
+    results = []
+    for n, scenario in enumerate(scenarios):
+        runs = outcomes[n * replications:(n + 1) * replications]
+        results.append({
+            "scenario": scenario.name,
+            "end_time": scenario.end_time.isoformat(),
+            "demand_ranges": scenario.demand_ranges,
+            "replications": replications,
+            "transported": describe([transported for transported, _, _ in runs]),
+            "average_load": describe([load for _, load, _ in runs]),
+            "unserved": describe([sum(waiting) for _, _, waiting in runs]),
+            "unserved_by_stop": {name: describe([waiting[i] for _, _, waiting in runs])
+                                 for i, name in enumerate(network.stop_names)},
+        })
+    return results
+
+
+def format_report(results):
+    lines = []
+    for result in results:
+        lines.append(f"--- {result['scenario']} ({result['replications']} повторов) ---")
+        for key, title in (("transported", "Перевезено пассажиров"), ("average_load", "Средняя загрузка"),
+                           ("unserved", "Недовольных пассажиров")):
+            stats = result[key]
+            lines.append(f"  {title}: {stats['mean']:.1f} ± {stats['std']:.1f} "
+                         f"(p5 {stats['p5']:.1f}, медиана {stats['p50']:.1f}, p95 {stats['p95']:.1f})")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Монте-Карло прогон simulate_buses по сценариям")
+    parser.add_argument("--replications", type=int, default=100)
+    parser.add_argument("--horizons", type=int, nargs="+", default=[7], help="Длительность симуляции, дни")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--network", help="JSON с сетью маршрутов (см. network.py)")
+    parser.add_argument("--output", help="Файл для JSON с результатами")
+    args = parser.parse_args(argv)
+
+    network = None
+    if args.network:
+        from network import load_network
+        network = load_network(args.network)
+    results = run_scenarios(scenario_grid(args.horizons), args.replications, network=network,
+                            seed=args.seed, workers=args.workers)
+    print(format_report(results), file=sys.stderr)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
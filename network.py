@@ -0,0 +1,165 @@
+"""
+Сеть маршрутов: остановки, маршруты, парки автобусов и водителей.
+
+Конфигурация - JSON вида
+
+    {
+        "stops": ["Stop A", "Stop B", "Stop C"],
+        "routes": [
+            {"name": "1", "stops": ["Stop A", "Stop B", "Stop C"], "buses": 8,
+             "capacity": 26, "headway": 15},
+            {"name": "2", "stops": ["Stop C", "Stop B"], "buses": 3,
+             "drivers": [[1, "07:00"], [2, "11:00", 1], [1, "10:15"]]}
+        ]
+    }
+
+Остановки с одинаковым именем в разных маршрутах - одна общая остановка.
+Маршрут кольцевой: после последней (конечной) остановки автобус идёт на
+первую. На каждом автобусе работает свой водитель, поэтому пул водителей
+маршрута совпадает с его парком; "drivers" - необязательный состав пула
+(тип, начало смены "ЧЧ:ММ", день начала 3-дневного цикла) для simulate_buses.
+headway - интервал выхода автобусов маршрута на линию, мин.
+"""
+import json
+from array import array
+from functools import lru_cache
+
+from genome import SLOT_MINUTES, Genome, shift_window
+from tables import MINUTES_PER_DAY
+
+
+class Route:
+    __slots__ = ("index", "name", "stops", "buses", "capacity", "headway", "roster", "first_bus")
+
+    def __init__(self, index, name, stops, buses, capacity, headway, roster, first_bus):
+        self.index = index
+        self.name = name
+        self.stops = stops            # array индексов остановок по порядку движения
+        self.buses = buses            # Размер парка (и пула водителей)
+        self.capacity = capacity
+        self.headway = headway
+        self.roster = roster          # Гены водителей (тип, слот, день) или None
+        self.first_bus = first_bus    # Сквозной номер первого автобуса маршрута
+
+    @property
+    def bus_range(self):
+        return range(self.first_bus, self.first_bus + self.buses)
+
+    def __repr__(self):
+        return f"Route({self.name!r}, stops={len(self.stops)}, buses={self.buses})"
+
+
+class Network:
+    """
+    Сеть в виде плоских массивов: автобусы и водители нумеруются сквозь все
+    маршруты (сначала весь парк первого маршрута, потом второго и т.д.),
+    bus_route[b] - маршрут автобуса, stop_routes[s] - маршруты через
+    остановку s. Такая раскладка одинаково подходит и для 8 автобусов, и для
+    тысяч: в симуляции остаются только обращения по индексам.
+    """
+
+    def __init__(self, stop_names, routes):
+        self.stop_names = list(stop_names)
+        self.stop_index = {name: i for i, name in enumerate(self.stop_names)}
+        if len(self.stop_index) != len(self.stop_names):
+            raise ValueError("Имена остановок должны быть уникальными")
+        self.routes = []
+        self.bus_route = array("i")
+        for index, route in enumerate(routes):
+            try:
+                stops = array("i", (self.stop_index[name] for name in route["stops"]))
+            except KeyError as error:
+                raise ValueError(f"Маршрут {route['name']}: неизвестная остановка {error}") from None
+            if not stops:
+                raise ValueError(f"Маршрут {route['name']}: нет остановок")
+            roster = route.get("drivers")
+            buses = route.get("buses", len(roster) if roster else 0)
+            if roster is not None:
+                if len(roster) != buses:
+                    raise ValueError(f"Маршрут {route['name']}: водителей в пуле должно быть столько же, "
+                                     f"сколько автобусов ({buses})")
+                roster = tuple(_parse_gene(gene) for gene in roster)
+            self.routes.append(Route(index, str(route["name"]), stops, buses, route.get("capacity", 26),
+                                     route.get("headway", 15), roster, len(self.bus_route)))
+            self.bus_route.extend([index] * buses)
+        self.stop_routes = [array("i") for _ in self.stop_names]
+        for route in self.routes:
+            for stop in sorted(set(route.stops)):
+                self.stop_routes[stop].append(route.index)
+
+    @property
+    def num_stops(self):
+        return len(self.stop_names)
+
+    @property
+    def num_buses(self):
+        return len(self.bus_route)
+
+    def route_of(self, bus):
+        return self.routes[self.bus_route[bus]]
+
+    def bus_routes(self):
+        """Массив остановок маршрута для каждого автобуса (для engine.EventSimulation)."""
+        return [self.routes[route].stops for route in self.bus_route]
+
+    def capacities(self):
+        return [self.routes[route].capacity for route in self.bus_route]
+
+    def routes_at(self, stop_name):
+        """Маршруты, проходящие через остановку."""
+        return [self.routes[route] for route in self.stop_routes[self.stop_index[stop_name]]]
+
+    def driver_slices(self):
+        """Отрезки генома (начало, конец) с водителями каждого непустого маршрута."""
+        return [(route.first_bus, route.first_bus + route.buses) for route in self.routes if route.buses]
+
+    def __repr__(self):
+        return f"Network(stops={self.num_stops}, routes={len(self.routes)}, buses={self.num_buses})"
+
+
+def _parse_gene(gene):
+    """[тип, "ЧЧ:ММ"(, день)] -> (тип, слот, день) как в genome.Genome."""
+    driver_type, start = gene[0], gene[1]
+    hours, minutes = map(int, start.split(":"))
+    if minutes % SLOT_MINUTES:
+        raise ValueError(f"Начало смены {start} не кратно {SLOT_MINUTES} минутам")
+    slot = (hours * 60 + minutes) // SLOT_MINUTES
+    if shift_window(driver_type, slot)[1] >= MINUTES_PER_DAY:
+        raise ValueError(f"Смена водителя типа {driver_type} с {start} заканчивается после полуночи")
+    return driver_type, slot, gene[2] if len(gene) > 2 and gene[2] else 0
+
+
+def _format_gene(gene):
+    """(тип, слот, день) -> [тип, "ЧЧ:ММ", день] как в "drivers" конфигурации."""
+    driver_type, slot, day = gene
+    start = slot * SLOT_MINUTES
+    return [driver_type, f"{start // 60:02d}:{start % 60:02d}", day]
+
+
+def save_roster(path, genome):
+    """Сохраняет расписание водителей (genome.Genome) в JSON: {"drivers": [[тип, "ЧЧ:ММ", день], ...]}."""
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"drivers": [_format_gene(gene) for gene in genome]}, file, ensure_ascii=False)
+
+
+def load_roster(path):
+    """Расписание водителей, сохранённое save_roster, как genome.Genome."""
+    with open(path, encoding="utf-8") as file:
+        return Genome.from_genes(_parse_gene(gene) for gene in json.load(file)["drivers"])
+
+
+def network_from_config(config):
+    return Network(config["stops"], config["routes"])
+
+
+def load_network(path):
+    """Загружает сеть из JSON-файла (формат - в описании модуля)."""
+    with open(path, encoding="utf-8") as file:
+        return network_from_config(json.load(file))
+
+
+@lru_cache(maxsize=None)
+def default_network(buses=8):
+    """Исходная модель: 8 остановок Stop A..Stop H на одном кольцевом маршруте."""
+    stops = [f"Stop {chr(65 + i)}" for i in range(8)]
+    return Network(stops, [{"name": "1", "stops": stops, "buses": buses, "capacity": 26, "headway": 15}])
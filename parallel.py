@@ -0,0 +1,81 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+_network = None  # Сеть маршрутов и начальное состояние рабочего процесса (передаются один раз при запуске)
+_state = None
+
+
+def _init_worker(network, state=None):
+    global _network, _state
+    _network, _state = network, state
+
+
+def _evaluate(task):
+    """Считает приспособленность одного генома в рабочем процессе."""
+    from core import drivers_from_genome, simulate_schedule
+
+    genome, seed, simulation_end_time, crn = task
+    if crn:
+        # Общие случайные числа: потоки остановок и автобусов засеваются от seed повтора
+        return simulate_schedule(drivers_from_genome(genome), simulation_end_time, crn_seed=seed,
+                                 network=_network, state=_state)
+    # Каждая оценка получает свой поток случайных чисел, зависящий только от
+    # seed и номера оценки, поэтому результат не зависит от того, какой
+    # процесс и в каком порядке её выполнил.
+    random.seed(seed)
+    return simulate_schedule(drivers_from_genome(genome), simulation_end_time, network=_network, state=_state)
+
+
+class ParallelEvaluator:
+    """
+    Оценка популяции в пуле процессов.
+
+    Особи передаются в процессы как компактные геномы (genome.Genome),
+    а не как списки объектов Driver.
+    """
+
+    def __init__(self, workers=None, chunksize=None, seed=None, simulation_end_time=None, network=None,
+                 state=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.simulation_end_time = simulation_end_time
+        self.chunksize = chunksize
+        self.network = network
+        self.start_state = state  # replan.FleetState: оценка с середины симуляции
+        # Свой генератор: включение пула процессов не сдвигает операторы ГА
+        self.seed = seed if seed is not None else random.Random().getrandbits(64)
+        self.evaluations = 0  # Номер следующей оценки, из него выводится seed
+        self.pool = None
+
+    def map(self, genomes, crn_seeds=None):
+        """
+        Возвращает приспособленность для каждого генома из genomes.
+
+        Если заданы crn_seeds, i-й геном считается на общих случайных числах
+        повтора crn_seeds[i] (см. core.simulate_schedule).
+        """
+        if not genomes:
+            return []
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                            initargs=(self.network, self.start_state))
+        if crn_seeds is not None:
+            tasks = [(genome, seed, self.simulation_end_time, True) for genome, seed in zip(genomes, crn_seeds)]
+        else:
+            tasks = [(genome, f"{self.seed}:{self.evaluations + n}", self.simulation_end_time, False)
+                     for n, genome in enumerate(genomes)]
+            self.evaluations += len(tasks)
+        chunksize = self.chunksize or max(1, len(tasks) // (self.workers * 4))
+        return list(self.pool.map(_evaluate, tasks, chunksize=chunksize))
+
+    def state(self):
+        return {"seed": self.seed, "evaluations": self.evaluations}
+
+    def load_state(self, state):
+        self.seed = state["seed"]
+        self.evaluations = state["evaluations"]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
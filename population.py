@@ -0,0 +1,123 @@
+import random
+from collections import OrderedDict
+
+from genome import SLOT_HOURS, Genome, random_slot
+from tables import SIMULATION_END, SIMULATION_START, horizon_tables
+
+MAX_START_DAY = 8  # Дни начала цикла второго типа: 1 - 16 декабря, ..., 8 - 23 декабря
+
+
+class PopulationManager:
+    """
+    Канонизация, проверка допустимости и отсев повторов для ГА.
+
+    Водители взаимозаменяемы: все автобусы одинаковые и выходят с первой
+    остановки одновременно, поэтому расписания, отличающиеся только порядком
+    водителей, эквивалентны. Эквивалентны и дни начала цикла, дающие те же
+    рабочие минуты на горизонте симуляции. Канонический геном - гены,
+    приведённые к наименьшему эквивалентному дню и отсортированные внутри
+    каждого отрезка segments (пула водителей маршрута, см. network.Network).
+
+    Недопустимый ген - водитель, ни разу не выходящий на смену за горизонт
+    (например, 3-дневный цикл второго типа мимо горизонта); такой ген
+    чинится подбором другого дня, а затем и слота. Канонические геномы, уже
+    просимулированные или уже отобранные в поколение, отбрасываются до оценки.
+
+    Гены водителей fixed (номера, закреплённые при перепланировании, см.
+    replan.py) не канонизируются, не чинятся и не участвуют в сортировке.
+    """
+
+    def __init__(self, start_time=SIMULATION_START, end_time=SIMULATION_END,
+                 max_seen=100000, repair_attempts=20, attempts_per_candidate=50, segments=None, fixed=()):
+        self.tables = horizon_tables(start_time, end_time)
+        self.segments = segments  # None - все водители взаимозаменяемы
+        self.fixed = frozenset(fixed)
+        self.max_seen = max_seen
+        self.repair_attempts = repair_attempts
+        self.attempts_per_candidate = attempts_per_candidate  # Потом повторы допускаются
+        self.genes = {}  # ген -> (канонический ген, рабочие отрезки на горизонте)
+        self.seen = OrderedDict()  # Уже просимулированные канонические геномы
+        self.duplicates = 0  # Отброшено повторов
+        self.repaired = 0    # Починено недопустимых генов
+
+    def _gene_info(self, gene):
+        info = self.genes.get(gene)
+        if info is None:
+            driver_type, slot, start_day = gene
+            intervals = tuple(self.tables.gene_intervals(*gene))
+            canonical = (driver_type, slot, 0)  # День важен только для второго типа
+            if driver_type == 2:
+                canonical = next((2, slot, day) for day in range(start_day + 1)
+                                 if day == start_day or self.tables.gene_intervals(2, slot, day) == list(intervals))
+            info = self.genes[gene] = (canonical, intervals)
+        return info
+
+    def feasible(self, gene):
+        """Выходит ли водитель с этим геном на смену хоть раз за горизонт."""
+        return bool(self._gene_info(gene)[1])
+
+    def repair(self, gene):
+        """Допустимый ген того же типа: сначала другой день цикла, затем другой слот."""
+        driver_type, slot, _ = gene
+        for attempt in range(self.repair_attempts):
+            if attempt >= self.repair_attempts // 2:
+                slot = random_slot(*SLOT_HOURS[driver_type])
+            candidate = (driver_type, slot, random.randint(1, MAX_START_DAY) if driver_type == 2 else 0)
+            if self.feasible(candidate):
+                return candidate
+        return gene
+
+    def canonical(self, genome):
+        """Канонический допустимый геном, эквивалентный genome."""
+        genes = []
+        for i, gene in enumerate(genome):
+            if i not in self.fixed:
+                if not self.feasible(gene):
+                    gene = self.repair(gene)
+                    self.repaired += 1
+                gene = self._gene_info(gene)[0]
+            genes.append(gene)
+        for start, end in self.segments or [(0, len(genes))]:
+            free = [i for i in range(start, end) if i not in self.fixed]
+            for i, gene in zip(free, sorted(genes[i] for i in free)):
+                genes[i] = gene
+        return Genome.from_genes(genes)
+
+    def admit(self, genome, taken, force=False):
+        """
+        Канонический геном, если он ещё не встречался (ни в taken, ни среди
+        просимулированных), иначе None. С force=True повтор тоже принимается.
+        """
+        genome = self.canonical(genome)
+        if not force and (genome in taken or genome in self.seen):
+            self.duplicates += 1
+            return None
+        taken.add(genome)
+        return genome
+
+    def mark_seen(self, population):
+        for genome in population:
+            self.seen[genome] = None
+            self.seen.move_to_end(genome)
+        while len(self.seen) > self.max_seen:
+            self.seen.popitem(last=False)
+
+    def diversity(self, population):
+        """Средняя доля несовпадающих генов по всем парам особей (0 - все одинаковы)."""
+        genomes = [list(genome) for genome in population]
+        pairs = len(genomes) * (len(genomes) - 1) // 2
+        if not pairs:
+            return 0.0
+        total = 0.0
+        for i, a in enumerate(genomes):
+            for b in genomes[i + 1:]:
+                total += sum(x != y for x, y in zip(a, b)) / max(len(a), len(b))
+        return total / pairs
+
+    def state(self):
+        return {"seen": self.seen, "duplicates": self.duplicates, "repaired": self.repaired}
+
+    def load_state(self, state):
+        self.seen = OrderedDict(state["seen"])
+        self.duplicates = state["duplicates"]
+        self.repaired = state["repaired"]
@@ -0,0 +1,88 @@
+import math
+import random
+from collections import OrderedDict
+from statistics import NormalDist, fmean, stdev
+
+
+class Racing:
+    """
+    Адаптивное число повторов для шумной приспособленности.
+
+    Повтор r любого генома считается на общих случайных числах (CRN): потоки
+    спроса на остановках и высадок/времени в пути автобусов засеваются
+    seed_for(r), поэтому геномы сравниваются на одной и той же реализации
+    случайностей. Сначала каждая особь получает min_replications повторов,
+    затем повторы добавляются только тем, чей доверительный интервал среднего
+    накрывает границу отбора (середину между keep-й и следующей особью), -
+    остальные уже надёжно выше или ниже границы. Повторов на особь не больше
+    max_replications.
+    """
+
+    def __init__(self, seed=None, min_replications=3, max_replications=10, confidence=0.95, max_size=10000):
+        if not 2 <= min_replications <= max_replications:
+            raise ValueError("Нужно 2 <= min_replications <= max_replications")
+        # Не из глобального генератора, иначе включение гонки меняло бы выбор операторов ГА
+        self.seed = seed if seed is not None else random.Random().getrandbits(64)
+        self.min_replications = min_replications
+        self.max_replications = max_replications
+        self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+        self.max_size = max_size
+        self.samples = OrderedDict()  # геном -> значения по номерам повторов
+        self.replications = 0  # Всего сделано симуляций
+
+    def seed_for(self, replication):
+        return f"{self.seed}:{replication}"
+
+    def race(self, population, keep, simulate):
+        """
+        Средние значения приспособленности для особей population.
+
+        keep - сколько лучших особей отбирается (граница гонки);
+        simulate(tasks) получает список пар (геном, номер повтора)
+        и возвращает список значений.
+        """
+        unique = list(dict.fromkeys(population))
+        for genome in unique:
+            if genome in self.samples:
+                self.samples.move_to_end(genome)
+            else:
+                self.samples[genome] = []
+        self._sample([(genome, r) for genome in unique
+                      for r in range(len(self.samples[genome]), self.min_replications)], simulate)
+        while True:
+            summary = {genome: self._summary(genome) for genome in unique}
+            if keep >= len(unique):
+                break
+            ordered = sorted(unique, key=lambda genome: summary[genome][0], reverse=True)
+            cutoff = (summary[ordered[keep - 1]][0] + summary[ordered[keep]][0]) / 2
+            undecided = [genome for genome in unique
+                         if abs(summary[genome][0] - cutoff) < summary[genome][1]
+                         and len(self.samples[genome]) < self.max_replications]
+            if not undecided:
+                break
+            self._sample([(genome, len(self.samples[genome])) for genome in undecided], simulate)
+        while len(self.samples) > self.max_size:
+            self.samples.popitem(last=False)  # Забываем давно не встречавшиеся геномы
+        return [summary[genome][0] for genome in population]
+
+    def _summary(self, genome):
+        """Среднее и полуширина доверительного интервала."""
+        values = self.samples[genome]
+        return fmean(values), self.z * stdev(values) / math.sqrt(len(values))
+
+    def _sample(self, tasks, simulate):
+        if not tasks:
+            return
+        for (genome, replication), value in zip(tasks, simulate(tasks)):
+            values = self.samples[genome]
+            if replication == len(values):
+                values.append(value)
+        self.replications += len(tasks)
+
+    def state(self):
+        return {"seed": self.seed, "samples": self.samples, "replications": self.replications}
+
+    def load_state(self, state):
+        self.seed = state["seed"]
+        self.samples = OrderedDict(state["samples"])
+        self.replications = state["replications"]
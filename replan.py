@@ -0,0 +1,124 @@
+"""
+Перепланирование расписания с текущего момента после сбоев.
+
+Когда в середине недели ломается автобус или заболевает водитель,
+оставшийся горизонт нужно перепланировать быстро. Для этого симуляция
+продолжается не с 16.12 07:00, а из состояния парка на текущий момент
+(FleetState), водители, уже вышедшие на смену, не меняются, а ГА
+стартует с прошлой популяции и ограничен бюджетом времени:
+
+    state = simulate_until(roster, now).with_unavailable({2})
+    result = replan(state, roster, previous_population, budget=Budget(seconds=30))
+"""
+import random
+from collections import namedtuple
+from datetime import timedelta
+
+from budget import Budget
+from core import Bus, BusStop, drivers_from_genome
+from engine import EventSimulation
+from network import default_network
+from tables import SIMULATION_END, SIMULATION_START
+
+ReplanResult = namedtuple("ReplanResult", "roster fitness population stop_reason")
+
+
+class FleetState:
+    """
+    Состояние парка на момент now, с которого симуляция продолжается:
+    ожидающие по остановкам, загрузка, позиция на маршруте и время
+    следующего прибытия по автобусам, состояние перерывов водителей.
+    unavailable - автобусы, которые до конца горизонта не выходят на линию
+    (сломан автобус или нет водителя).
+    """
+
+    __slots__ = ("now", "waiting", "loads", "positions", "bus_schedule", "breaks", "unavailable")
+
+    def __init__(self, now, waiting, loads, positions, bus_schedule, breaks, unavailable=frozenset()):
+        self.now = now
+        self.waiting = tuple(waiting)
+        self.loads = tuple(loads)
+        self.positions = tuple(positions)
+        self.bus_schedule = tuple(bus_schedule)
+        self.breaks = tuple(breaks)  # (на перерыве, начало перерыва, обед уже был)
+        self.unavailable = frozenset(unavailable)
+
+    @classmethod
+    def capture(cls, simulation, minute):
+        """Состояние симуляции, остановленной run_until(minute)."""
+        tables = simulation.tables
+        return cls(tables.to_datetime(minute),
+                   [stop.waiting_passengers for stop in simulation.bus_stops],
+                   [bus.current_load for bus in simulation.buses],
+                   simulation.bus_positions,
+                   [tables.to_datetime(scheduled) for scheduled in simulation.bus_schedule],
+                   [(driver.is_on_break, driver.break_start_time, driver.has_taken_break)
+                    for driver in simulation.drivers])
+
+    def with_unavailable(self, buses):
+        """Копия состояния, в которой автобусы buses больше не выходят на линию."""
+        return FleetState(self.now, self.waiting, self.loads, self.positions, self.bus_schedule, self.breaks,
+                          self.unavailable | set(buses))
+
+    def apply(self, bus_stops, buses, drivers):
+        """Переносит состояние на свежие объекты симуляции (см. core.simulate_schedule)."""
+        if len(bus_stops) != len(self.waiting) or len(buses) != len(self.loads):
+            raise ValueError("Состояние снято с другой сети")
+        for stop, waiting in zip(bus_stops, self.waiting):
+            stop.waiting_passengers = waiting
+        for bus, load in zip(buses, self.loads):
+            bus.current_load = load
+        for i, (driver, (on_break, break_start_time, lunch_taken)) in enumerate(zip(drivers, self.breaks)):
+            driver.is_on_break = on_break
+            driver.break_start_time = break_start_time
+            driver.has_taken_break = lunch_taken
+            if i in self.unavailable:
+                driver.schedule = [None] * 7
+
+    def committed(self, roster):
+        """
+        Водители расписания roster, уже находящиеся на смене, - их решения
+        не меняются. Водители только что созданы и не на перерыве, поэтому
+        can_drive проверяет окно смены и 3-дневный цикл второго типа.
+        """
+        return [i for i, driver in enumerate(drivers_from_genome(roster))
+                if i not in self.unavailable and driver.can_drive(self.now)]
+
+
+def simulate_until(roster, now, network=None, seed=None):
+    """Прогоняет расписание roster (genome.Genome) от начала до now и возвращает FleetState."""
+    network = network or default_network(len(roster))
+    if seed is not None:
+        random.seed(seed)
+    bus_stops = [BusStop(name) for name in network.stop_names]
+    buses = [Bus(f"{100 + i}", capacity) for i, capacity in enumerate(network.capacities())]
+    simulation = EventSimulation(bus_stops, buses, drivers_from_genome(roster), [SIMULATION_START] * len(buses),
+                                 SIMULATION_START, now + timedelta(minutes=1), bus_routes=network.bus_routes())
+    minute = -(-(now - SIMULATION_START) // timedelta(minutes=1))
+    simulation.run_until(minute)
+    return FleetState.capture(simulation, minute)
+
+
+def replan(state, roster, previous_population=(), fixed=None, budget=None, population_size=50, generations=100,
+           mutation_rate=0.1, simulation_end_time=SIMULATION_END, network=None, **options):
+    """
+    Новое расписание на остаток горизонта с момента state.now.
+
+    roster - действующее расписание (genome.Genome); гены водителей fixed
+    (по умолчанию - уже вышедших на смену и выбывших) сохраняются. ГА начинает с
+    previous_population и действующего расписания, оценивает расписания
+    симуляцией от state.now до simulation_end_time и останавливается по
+    budget (по умолчанию 60 секунд). Остальные параметры передаются
+    в GeneticAlgorithm.
+    """
+    from genetik import GeneticAlgorithm
+
+    if fixed is None:
+        fixed = state.committed(roster) + sorted(state.unavailable)
+    ga = GeneticAlgorithm(population_size, generations, mutation_rate, simulation_end_time=simulation_end_time,
+                          network=network, start_state=state, fixed_genes={i: roster[i] for i in fixed}, **options)
+    best = ga.evolve(budget=budget or Budget(seconds=60), population=[roster, *previous_population])
+    changed = [i for i in fixed if best[i] != roster[i]]
+    if changed:
+        raise RuntimeError(f"Перепланирование изменило закреплённых водителей: {changed}")
+    return ReplanResult(best, ga.best[0], ga.population, ga.stop_reason)
@@ -0,0 +1,132 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta
+
+from tables import MINUTES_PER_DAY, SIMULATION_START, WEEKDAY_NAMES
+
+Arrival = namedtuple("Arrival", "time stop bus driver waiting picked_up dropped_off")
+
+
+class BusSchedule:
+    """
+    Журнал прибытий автобусов в колоночном виде.
+
+    Каждое поле хранится в отдельном типизированном массиве (минута от начала
+    симуляции, номера остановки, автобуса и водителя, пассажиры), а имена
+    остановок, автобусов и водителей - один раз в справочниках. Для быстрых
+    запросов ведутся индексы строк по остановкам, автобусам и дням.
+    Расход памяти - несколько десятков байт на прибытие, без словаря на запись.
+    """
+
+    def __init__(self, start_time=SIMULATION_START):
+        self.start_time = start_time
+        self.start_offset = start_time.hour * 60 + start_time.minute
+        self.minute = array('i')
+        self.stop_id = array('H')
+        self.bus_id = array('H')
+        self.driver_id = array('H')
+        self.waiting = array('i')
+        self.picked_up = array('H')
+        self.dropped_off = array('H')
+
+        self.stops, self.buses, self.drivers = [], [], []  # Справочники имён
+        self._ids = ({}, {}, {})
+        self.by_stop, self.by_bus = [], []  # Номера строк по остановке / автобусу
+        self.by_day = {}                    # Номера строк по дню симуляции
+
+    def __len__(self):
+        return len(self.minute)
+
+    def _intern(self, kind, name):
+        ids = self._ids[kind]
+        if name not in ids:
+            ids[name] = len(ids)
+            (self.stops, self.buses, self.drivers)[kind].append(name)
+            if kind == 0:
+                self.by_stop.append(array('I'))
+            elif kind == 1:
+                self.by_bus.append(array('I'))
+        return ids[name]
+
+    def to_minutes(self, moment):
+        """Минута от начала симуляции для datetime (целые числа возвращаются как есть)."""
+        if isinstance(moment, datetime):
+            return (moment - self.start_time) // timedelta(minutes=1)
+        return moment
+
+    def to_datetime(self, minute):
+        return self.start_time + timedelta(minutes=minute)
+
+    def day_of(self, minute):
+        return (minute + self.start_offset) // MINUTES_PER_DAY
+
+    def add_entry(self, stop_name, bus_number, driver_name, arrival_time, waiting_passengers, picked_up, dropped_off):
+        minute = self.to_minutes(arrival_time)
+        stop = self._intern(0, stop_name)
+        bus = self._intern(1, bus_number)
+        row = len(self.minute)
+        self.minute.append(minute)
+        self.stop_id.append(stop)
+        self.bus_id.append(bus)
+        self.driver_id.append(self._intern(2, driver_name))
+        self.waiting.append(waiting_passengers)
+        self.picked_up.append(picked_up)
+        self.dropped_off.append(dropped_off)
+        self.by_stop[stop].append(row)
+        self.by_bus[bus].append(row)
+        self.by_day.setdefault(self.day_of(minute), array('I')).append(row)
+
+    def row(self, row):
+        return Arrival(self.to_datetime(self.minute[row]), self.stops[self.stop_id[row]],
+                       self.buses[self.bus_id[row]], self.drivers[self.driver_id[row]],
+                       self.waiting[row], self.picked_up[row], self.dropped_off[row])
+
+    def arrivals_at(self, stop_name, start=None, end=None):
+        """Прибытия на остановку в интервале [start, end) (datetime или минуты)."""
+        stop = self._ids[0].get(stop_name)
+        if stop is None:
+            return []
+        rows = self.by_stop[stop]
+        # Строки добавляются в порядке времени, поэтому границы ищем бинарным поиском
+        lo = 0 if start is None else bisect_left(rows, self.to_minutes(start), key=self.minute.__getitem__)
+        hi = len(rows) if end is None else bisect_left(rows, self.to_minutes(end), key=self.minute.__getitem__)
+        return [self.row(row) for row in rows[lo:hi]]
+
+    def headways(self, stop_name):
+        """Интервалы (мин) между последовательными прибытиями на остановку."""
+        stop = self._ids[0].get(stop_name)
+        if stop is None:
+            return []
+        minutes = [self.minute[row] for row in self.by_stop[stop]]
+        return [later - earlier for earlier, later in zip(minutes, minutes[1:])]
+
+    def headway_distribution(self):
+        """Распределение интервалов движения {остановка: Counter(интервал -> число)}."""
+        return {stop_name: Counter(self.headways(stop_name)) for stop_name in self.stops}
+
+    def load_timeline(self, bus_number):
+        """Загрузка автобуса после каждого прибытия: список (время, загрузка)."""
+        bus = self._ids[1].get(bus_number)
+        if bus is None:
+            return []
+        timeline = []
+        load = 0
+        for row in self.by_bus[bus]:
+            load += self.picked_up[row] - self.dropped_off[row]
+            timeline.append((self.to_datetime(self.minute[row]), load))
+        return timeline
+
+    def print_schedule(self):
+        print("\n--- Расписание автобусов по остановкам ---")
+        for day in sorted(self.by_day):
+            date_key = self.start_time.date() + timedelta(days=day)
+            print(f"\nДата: {date_key}, {WEEKDAY_NAMES[date_key.weekday()]}")
+            stops = {}  # Остановки в порядке первого прибытия за день
+            for row in self.by_day[day]:
+                stops.setdefault(self.stop_id[row], []).append(row)
+            for stop, rows in stops.items():
+                print(f"Остановка: {self.stops[stop]}:")
+                for row in rows:
+                    print(f"  Время: {self.to_datetime(self.minute[row]).strftime('%H:%M')} - "
+                          f"Автобус: {self.buses[self.bus_id[row]]}.")
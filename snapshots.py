@@ -0,0 +1,99 @@
+import random
+from collections import OrderedDict
+
+
+class PrefixSnapshots:
+    """
+    Оценка расписаний с общего начала по снимкам состояния на границах суток.
+
+    Расписания, отличающиеся только водителями, которые впервые выходят на
+    смену позже (например, днём начала цикла второго типа), до этого момента
+    симулируются одинаково. Симуляция идёт на общих случайных числах (CRN,
+    см. core.simulate_schedule), и на каждой полуночи горизонта её
+    состояние (engine.EventSimulation.save_state) запоминается под ключом
+    из seed повтора и рабочих минут всех водителей до этой полуночи. Новое
+    расписание продолжается с последнего снимка, до которого оно совпадает
+    с уже просимулированным, а результат в точности равен полному прогону.
+
+    Мутация водителя сохраняет общее начало только до его первой смены,
+    поэтому снимки запоминаются лишь на полуночах, до которых хотя бы один
+    водитель ещё не выходил на линию. Хранится не больше max_size снимков (LRU).
+    """
+
+    def __init__(self, seed=None, max_size=500):
+        # Не из глобального random: снимки не должны менять ход ГА
+        self.seed = seed if seed is not None else random.Random().getrandbits(64)
+        self.max_size = max_size
+        self.snapshots = OrderedDict()  # (seed, граница, рабочие минуты водителей) -> engine.SavedState
+        self.tables = None
+        self.genes = {}  # ген -> отрезки рабочих минут на горизонте
+        self.hits = 0
+        self.misses = 0
+        self.simulated = 0  # Минут горизонта, просимулированных заново
+        self.skipped = 0    # Минут горизонта, пропущенных благодаря снимкам
+
+    def _intervals(self, gene):
+        intervals = self.genes.get(gene)
+        if intervals is None:
+            intervals = self.genes[gene] = tuple(self.tables.gene_intervals(*gene))
+        return intervals
+
+    def _keys(self, genome, seed, boundaries):
+        """Ключи снимков для каждой границы: тип водителя и его рабочие отрезки до границы."""
+        intervals = [(gene[0], self._intervals(gene)) for gene in genome]
+        return [(seed, boundary, tuple((driver_type, tuple((lo, min(hi, boundary)) for lo, hi in spans
+                                                           if lo < boundary))
+                                       for driver_type, spans in intervals))
+                for boundary in boundaries]
+
+    def run(self, genome, simulation, seed=None):
+        """
+        Прогоняет simulation - свежую симуляцию расписания genome (genome.Genome)
+        на общих случайных числах seed (по умолчанию self.seed) - и возвращает
+        число перевезённых пассажиров.
+        """
+        seed = self.seed if seed is None else seed
+        tables = simulation.tables
+        if tables is not self.tables:
+            self.tables = tables
+            self.genes = {}
+        boundaries = [tables.day_start(day) for day in range(1, tables.num_days)]
+        boundaries = [boundary for boundary in boundaries if 0 < boundary < tables.horizon]
+        keys = self._keys(genome, seed, boundaries)
+        # Последняя полночь, до которой кто-то из водителей ещё не работал
+        latest = max(spans[0][0] if spans else tables.horizon for spans in map(self._intervals, genome))
+
+        done = 0
+        for n in range(len(keys) - 1, -1, -1):
+            saved = self.snapshots.get(keys[n])
+            if saved is not None:
+                self.snapshots.move_to_end(keys[n])
+                simulation.restore_state(saved)
+                done = n + 1
+                break
+        if done:
+            self.hits += 1
+            self.skipped += boundaries[done - 1]
+        else:
+            self.misses += 1
+        self.simulated += tables.horizon - (boundaries[done - 1] if done else 0)
+
+        for key, boundary in zip(keys[done:], boundaries[done:]):
+            if boundary > latest:
+                break
+            simulation.run_until(boundary)
+            self.snapshots[key] = simulation.save_state()
+            if len(self.snapshots) > self.max_size:
+                self.snapshots.popitem(last=False)
+        return simulation.run()
+
+    def skipped_share(self):
+        total = self.simulated + self.skipped
+        return self.skipped / total if total else 0.0
+
+    def state(self):
+        """Снимки - только ускорение, в контрольную точку попадает лишь seed."""
+        return {"seed": self.seed}
+
+    def load_state(self, state):
+        self.seed = state["seed"]
@@ -0,0 +1,115 @@
+import json
+import os
+import time
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+
+
+class _Timer:
+    __slots__ = ("stats", "name", "start")
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats.add_time(self.name, time.perf_counter() - self.start)
+
+
+class SimStats:
+    """
+    Счётчики и таймеры для симуляции и ГА.
+
+    Счётчики (count) - события, прибытия по остановкам, отказы can_drive,
+    перерывы; таймеры (timer) - суммарное время и число вызовов по фазам;
+    gauge - последнее значение величины (например, доля попаданий в кэш).
+    Если задан dump_path, maybe_dump() не чаще раза в dump_interval секунд
+    сохраняет снимок в JSON.
+    """
+
+    enabled = True
+
+    def __init__(self, dump_path=None, dump_interval=60.0):
+        self.counters = Counter()
+        self.times = defaultdict(float)
+        self.calls = Counter()
+        self.gauges = {}
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self.created = time.time()
+        self.last_dump = 0.0
+
+    def count(self, name, value=1):
+        self.counters[name] += value
+
+    def add_time(self, name, seconds):
+        self.times[name] += seconds
+        self.calls[name] += 1
+
+    def timer(self, name):
+        """Контекстный менеджер, добавляющий время блока к таймеру name."""
+        return _Timer(self, name)
+
+    def gauge(self, name, value):
+        self.gauges[name] = value
+
+    def snapshot(self):
+        return {
+            "elapsed": time.time() - self.created,
+            "counters": dict(self.counters),
+            "timers": {name: {"seconds": seconds, "calls": self.calls[name]}
+                       for name, seconds in self.times.items()},
+            "gauges": dict(self.gauges),
+        }
+
+    def dump(self, path=None):
+        """Атомарно сохраняет снимок в JSON."""
+        path = path or self.dump_path
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(self.snapshot(), file, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+        self.last_dump = time.time()
+
+    def maybe_dump(self):
+        if self.dump_path and time.time() - self.last_dump >= self.dump_interval:
+            self.dump()
+
+    def report(self):
+        """Краткая текстовая сводка."""
+        lines = ["--- Статистика ---"]
+        for name, seconds in sorted(self.times.items(), key=lambda item: -item[1]):
+            lines.append(f"  {name}: {seconds:.3f} с за {self.calls[name]} вызовов")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"  {name}: {value}")
+        for name, value in sorted(self.gauges.items()):
+            lines.append(f"  {name}: {value}")
+        return "\n".join(lines)
+
+
+class NullStats:
+    """Выключенная статистика: все методы ничего не делают."""
+
+    enabled = False
+
+    def count(self, name, value=1):
+        pass
+
+    def add_time(self, name, seconds):
+        pass
+
+    def timer(self, name):
+        return nullcontext()
+
+    def gauge(self, name, value):
+        pass
+
+    def maybe_dump(self):
+        pass
+
+
+NULL_STATS = NullStats()
@@ -0,0 +1,60 @@
+from functools import reduce
+
+from eventlog import ARRIVAL, SNAPSHOT
+
+
+class SimulationSummary:
+    """
+    Итоги симуляции как свёртка потока EventSimulation.stream().
+
+    Перевезённые пассажиры и средняя загрузка считаются по событиям
+    прибытия, недовольные пассажиры на остановках - по последнему снимку
+    состояния (в конце потока он отражает конец симуляции).
+    """
+
+    def __init__(self, stop_names):
+        self.stop_names = list(stop_names)
+        self.transported = 0
+        self.total_load = 0  # Сумма загрузки автобусов после посадки по всем прибытиям
+        self.trips = 0
+        self.waiting = None  # Ожидающие по остановкам из последнего снимка
+
+    def add(self, item):
+        """Шаг свёртки: учитывает событие или снимок и возвращает self."""
+        if item.kind == ARRIVAL:
+            self.add_arrival(item.dropped_off, item.load)
+        elif item.kind == SNAPSHOT:
+            self.waiting = item.waiting
+        return self
+
+    def add_arrival(self, dropped_off, load):
+        """Учитывает прибытие без события (для EventSimulation(on_arrival=...))."""
+        self.transported += dropped_off
+        self.total_load += load
+        self.trips += 1
+
+    @property
+    def average_load(self):
+        return self.total_load / self.trips if self.trips else 0.0
+
+    @property
+    def remaining(self):
+        return sum(self.waiting or ())
+
+    def report(self):
+        """Текст итогов в прежнем формате simulate_buses."""
+        lines = [
+            "\n--- Итоги симуляции ---",
+            f"Общее количество перевезенных пассажиров: {self.transported}",
+            f"Средняя загрузка автобусов: {self.average_load:.2f} пассажиров за поездку",
+            f"Общее количество недовольных пассажиров на всех остановках: {self.remaining}",
+            "Количество недовольных пассажиров на каждой остановке:",
+        ]
+        for name, waiting in zip(self.stop_names, self.waiting or ()):
+            lines.append(f"  {name}: {waiting} пассажиров")
+        return "\n".join(lines)
+
+
+def summarize(stream, stop_names):
+    """Сворачивает поток событий и снимков в SimulationSummary."""
+    return reduce(SimulationSummary.add, stream, SimulationSummary(stop_names))
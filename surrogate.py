@@ -0,0 +1,121 @@
+from tables import DAY, DEMAND_RANGES, NIGHT, PEAK, SIMULATION_END, SIMULATION_START, horizon_tables
+
+BANDS = (NIGHT, DAY, PEAK)
+
+
+def rank_correlation(xs, ys):
+    """Коэффициент ранговой корреляции Спирмена (без поправки на совпадения)."""
+    n = len(xs)
+    if n < 2:
+        return 0.0
+
+    def ranks(values):
+        order = sorted(range(n), key=values.__getitem__)
+        result = [0] * n
+        for rank, i in enumerate(order):
+            result[i] = rank
+        return result
+
+    rx, ry = ranks(xs), ranks(ys)
+    mean = (n - 1) / 2
+    cov = sum((a - mean) * (b - mean) for a, b in zip(rx, ry))
+    var = sum((a - mean) ** 2 for a in rx)
+    return cov / var if var else 0.0
+
+
+def _solve(matrix, vector):
+    """Решение системы линейных уравнений методом Гаусса (матрица маленькая)."""
+    n = len(vector)
+    rows = [list(row) + [value] for row, value in zip(matrix, vector)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(rows[r][col]))
+        if abs(rows[pivot][col]) < 1e-12:
+            return None
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for r in range(n):
+            if r != col:
+                factor = rows[r][col] / rows[col][col]
+                rows[r] = [a - factor * b for a, b in zip(rows[r], rows[col])]
+    return [rows[i][n] / rows[i][i] for i in range(n)]
+
+
+class CoverageSurrogate:
+    """
+    Дешёвая оценка расписания без симуляции.
+
+    Признаки генома - число водителе-минут в пиковые, дневные и ночные часы
+    (те же интервалы, что в BusStop.update_waiting_passengers и travel_time)
+    с учётом рабочих дней и 3-дневного цикла второго типа. Пока данных мало,
+    оценка - покрытие, взвешенное средним спросом интервала; после min_samples
+    наблюдений веса подбираются методом наименьших квадратов по уже
+    просимулированным геномам.
+    """
+
+    def __init__(self, start_time=SIMULATION_START, end_time=SIMULATION_END,
+                 min_samples=20, max_samples=5000):
+        self.tables = horizon_tables(start_time, end_time)
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.samples = {}  # геном -> (признаки, приспособленность)
+        self.weights = [0.0] + [sum(DEMAND_RANGES[band]) / 2 for band in BANDS]
+        self.correlations = []  # История корреляции оценки с реальной приспособленностью
+        # Префиксные суммы минут каждого интервала суток по горизонту
+        self.prefix = {band: [0] for band in BANDS}
+        for value in self.tables.band:
+            for band in BANDS:
+                self.prefix[band].append(self.prefix[band][-1] + (value == band))
+
+    def features(self, genome):
+        minutes = dict.fromkeys(BANDS, 0)
+        for gene in genome:
+            for lo, hi in self.tables.gene_intervals(*gene):
+                for band in BANDS:
+                    minutes[band] += self.prefix[band][hi] - self.prefix[band][lo]
+        return [1.0] + [minutes[band] / 60 for band in BANDS]
+
+    def score(self, genome):
+        return sum(w * x for w, x in zip(self.weights, self.features(genome)))
+
+    def select(self, candidates, count):
+        """Оставляет count самых перспективных кандидатов по оценке."""
+        return sorted(candidates, key=self.score, reverse=True)[:count]
+
+    def observe(self, genomes, scores):
+        """
+        Запоминает реальную приспособленность, обновляет веса и возвращает
+        ранговую корреляцию оценки с ней на переданных геномах.
+        """
+        predicted = [self.score(genome) for genome in genomes]
+        correlation = rank_correlation(predicted, list(scores))
+        self.correlations.append(correlation)
+        for genome, value in zip(genomes, scores):
+            if genome not in self.samples:
+                self.samples[genome] = (self.features(genome), value)
+        while len(self.samples) > self.max_samples:
+            del self.samples[next(iter(self.samples))]  # Забываем самые старые
+        if len(self.samples) >= self.min_samples:
+            self._fit()
+        return correlation
+
+    def state(self):
+        return {"samples": self.samples, "weights": self.weights, "correlations": self.correlations}
+
+    def load_state(self, state):
+        self.samples = dict(state["samples"])
+        self.weights = list(state["weights"])
+        self.correlations = list(state["correlations"])
+
+    def _fit(self):
+        size = len(self.weights)
+        matrix = [[0.0] * size for _ in range(size)]
+        vector = [0.0] * size
+        for x, y in self.samples.values():
+            for i in range(size):
+                vector[i] += x[i] * y
+                for j in range(size):
+                    matrix[i][j] += x[i] * x[j]
+        for i in range(1, size):
+            matrix[i][i] += 1e-6  # Небольшая регуляризация на случай вырожденных признаков
+        weights = _solve(matrix, vector)
+        if weights is not None:
+            self.weights = weights
@@ -0,0 +1,123 @@
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+
+from genome import START_DATE, WORK_DAYS, shift_window
+
+MINUTES_PER_DAY = 24 * 60
+SIMULATION_START = datetime.combine(START_DATE, time(7, 0))  # Выход первого автобуса
+WEEKDAY_NAMES = ("Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс")
+
+
+def horizon_end(days):
+    """Конец симуляции через days дней (для 7 дней - исходные 23.12 23:59)."""
+    return SIMULATION_START + timedelta(days=days, hours=16, minutes=59)
+
+
+SIMULATION_END = horizon_end(7)  # Конец симуляции по умолчанию
+
+# Интервалы времени суток, от которых зависят спрос и время в пути
+NIGHT = 0
+DAY = 1
+PEAK = 2
+DEMAND_RANGES = ((0, 7), (2, 12), (5, 22))    # Новые пассажиры на остановке при прибытии
+TRAVEL_RANGES = ((12, 13), (11, 12), (10, 11))  # Время в пути до следующей остановки, мин
+LUNCH_START = 13 * 60  # Обед водителей первого типа, минуты суток
+LUNCH_END = 15 * 60
+
+
+def hour_band(hour):
+    if 7 <= hour < 9 or 17 <= hour < 19:  # Пиковые часы
+        return PEAK
+    elif 9 <= hour < 17:                  # Дневные часы
+        return DAY
+    return NIGHT                          # Ночью
+
+
+_DAY_BAND = bytes(hour_band(minute // 60) for minute in range(MINUTES_PER_DAY))
+_DAY_LUNCH = bytes(LUNCH_START <= minute < LUNCH_END for minute in range(MINUTES_PER_DAY))
+
+
+class HorizonTables:
+    """
+    Таблицы по минутам симуляции, которые строятся один раз на прогон.
+
+    band[m] - интервал суток (NIGHT, DAY, PEAK) для спроса и времени в пути,
+    lunch[m] - 1, если минута попадает в обеденное окно 13:00-15:00.
+    availability(driver) строит битовую карту минут, когда водитель может
+    вести автобус, так что в цикле симуляции остаются только индексы.
+    """
+
+    def __init__(self, start_time, end_time):
+        self.start_time = start_time
+        self.end_time = end_time
+        self.start_offset = start_time.hour * 60 + start_time.minute  # Минута суток начала
+        self.horizon = -(-(end_time - start_time) // timedelta(minutes=1))
+        self.num_days = (self.horizon - 1 + self.start_offset) // MINUTES_PER_DAY + 1
+        span = slice(self.start_offset, self.start_offset + self.horizon)
+        self.band = (_DAY_BAND * self.num_days)[span]
+        self.lunch = (_DAY_LUNCH * self.num_days)[span]
+
+    def day_start(self, day):
+        """Минута симуляции, на которую приходится полночь дня с номером day."""
+        return day * MINUTES_PER_DAY - self.start_offset
+
+    def day_of(self, minute):
+        return (minute + self.start_offset) // MINUTES_PER_DAY
+
+    def to_datetime(self, minute):
+        return self.start_time + timedelta(minutes=minute)
+
+    def window(self, driver, day, check_cycle=True):
+        """Рабочее окно водителя (начало, конец) в минутах суток или None."""
+        date = self.start_time.date() + timedelta(days=day)
+        weekday = date.weekday()
+        if weekday >= len(driver.schedule) or driver.schedule[weekday] is None:
+            return None
+        # Для водителей второго типа проверяем цикл через 3 дня
+        if check_cycle and driver.driver_type == 2 and driver.start_day is not None:
+            days_since_start = (date - driver.start_day).days
+            if days_since_start < 0 or (days_since_start % 3) != 0:
+                return None
+        start_time, end_time = driver.schedule[weekday]
+        return start_time.hour * 60 + start_time.minute, end_time.hour * 60 + end_time.minute
+
+    def gene_intervals(self, driver_type, slot, start_day):
+        """
+        Отрезки минут [lo, hi), когда работает водитель с генами (тип, слот, день)
+        из genome.Genome, - те же минуты, что и в availability().
+        """
+        intervals = []
+        start, end = shift_window(driver_type, slot)
+        day_shift = (self.start_time.date() - START_DATE).days
+        for day in range(self.num_days):
+            if (self.start_time.weekday() + day) % 7 >= WORK_DAYS[driver_type]:
+                continue
+            if driver_type == 2 and start_day:
+                # Цикл через 3 дня, как в Driver.can_drive
+                days_since_start = day + day_shift - (start_day - 1)
+                if days_since_start < 0 or days_since_start % 3 != 0:
+                    continue
+            lo = max(self.day_start(day) + start, 0)
+            hi = min(self.day_start(day) + end + 1, self.horizon)
+            if lo < hi:
+                intervals.append((lo, hi))
+        return intervals
+
+    def availability(self, driver):
+        """Битовая карта минут, когда водитель работает (без учёта перерывов)."""
+        bitmap = bytearray(self.horizon)
+        for day in range(self.num_days):
+            window = self.window(driver, day)
+            if window is None:
+                continue
+            lo = max(self.day_start(day) + window[0], 0)
+            hi = min(self.day_start(day) + window[1] + 1, self.horizon)  # Конец смены включительно
+            if lo < hi:
+                bitmap[lo:hi] = b"\x01" * (hi - lo)
+        return bitmap
+
+
+@lru_cache(maxsize=16)
+def horizon_tables(start_time, end_time):
+    """Общие таблицы для периода симуляции (строятся один раз)."""
+    return HorizonTables(start_time, end_time)